@@ -1,22 +1,95 @@
-import httpx
-from .config import SLACK_BOT_TOKEN, BOT_ALERTS_CHANNEL_ID
-
-
-async def send_alert(function_name: str, error: str, context: dict = {}):
-    """Send error alert to #bot-alerts channel"""
-    context_lines = "\n".join([f"*{k}:* {v}" for k, v in context.items()])
-    alert_text = (
-        f"🚨 *Bot Alert*\n"
-        f"*Function:* {function_name}\n"
-        f"*Error:* {error}\n"
-        f"{context_lines}"
-    )
+import asyncio
+import time
+from collections import deque
+from .config import BOT_ALERTS_CHANNEL_ID, ALERT_WINDOW_SECONDS, ALERT_MAX_PER_MINUTE, ALERT_MAX_SIGNATURES
+from .http_clients import get_slack_client
+
+# (function, error) -> occurrences waiting for the next flush
+_pending = {}
+# Send times of recent alert messages, for the per-minute cap
+_recent_sends = deque()
+
+alert_stats = {"enqueued": 0, "coalesced": 0, "dropped": 0, "messages_sent": 0, "deferred_by_rate_limit": 0}
+
+
+def send_alert(function_name: str, error: str, context: dict = {}):
+    """Queue an error alert for #bot-alerts (returns immediately; delivery is batched)"""
+    alert_stats["enqueued"] += 1
+    key = (function_name, error)
+    entry = _pending.get(key)
+    if entry:
+        entry["count"] += 1
+        entry["context"] = dict(context)
+        alert_stats["coalesced"] += 1
+        return
+
+    if len(_pending) >= ALERT_MAX_SIGNATURES:
+        alert_stats["dropped"] += 1
+        print(f"⚠️ Alert buffer full - dropping alert from {function_name}: {error}")
+        return
+    _pending[key] = {"count": 1, "context": dict(context)}
+
+
+def _format_context(context):
+    return "\n".join([f"*{k}:* {v}" for k, v in context.items()])
+
+
+def _format_summary(entries):
+    if len(entries) == 1 and entries[0][1]["count"] == 1:
+        (function_name, error), entry = entries[0]
+        return (
+            f"🚨 *Bot Alert*\n"
+            f"*Function:* {function_name}\n"
+            f"*Error:* {error}\n"
+            f"{_format_context(entry['context'])}"
+        )
+
+    total = sum(entry["count"] for _, entry in entries)
+    lines = [f"🚨 *Bot Alerts* - {total} occurrence(s) of {len(entries)} issue(s)"]
+    for (function_name, error), entry in entries:
+        lines.append(f"\n*{function_name}:* {error} (×{entry['count']})")
+        context = _format_context(entry["context"])
+        if context:
+            lines.append(f"_Latest:_\n{context}")
+    return "\n".join(lines)
+
+
+def _rate_limited():
+    now = time.monotonic()
+    while _recent_sends and now - _recent_sends[0] > 60:
+        _recent_sends.popleft()
+    return len(_recent_sends) >= ALERT_MAX_PER_MINUTE
+
+
+async def flush_alerts():
+    """Post everything pending as one summary message, unless the per-minute cap is reached"""
+    if not _pending:
+        return
+    if _rate_limited():
+        # Keep coalescing until the next window
+        alert_stats["deferred_by_rate_limit"] += 1
+        return
+
+    entries = list(_pending.items())
+    _pending.clear()
+    _recent_sends.append(time.monotonic())
     try:
-        async with httpx.AsyncClient() as client:
-            await client.post(
-                "https://slack.com/api/chat.postMessage",
-                headers={"Authorization": f"Bearer {SLACK_BOT_TOKEN}"},
-                json={"channel": BOT_ALERTS_CHANNEL_ID, "text": alert_text}
-            )
+        await get_slack_client().post(
+            "chat.postMessage",
+            json={"channel": BOT_ALERTS_CHANNEL_ID, "text": _format_summary(entries)}
+        )
+        alert_stats["messages_sent"] += 1
     except Exception as e:
-        print(f"❌ Failed to send alert: {e}")
\ No newline at end of file
+        print(f"❌ Failed to send alert: {e}")
+
+
+async def run_alert_flusher():
+    """Background loop: flush coalesced alerts once per window"""
+    while True:
+        await asyncio.sleep(ALERT_WINDOW_SECONDS)
+        await flush_alerts()
+
+
+def alert_pipeline_stats():
+    """Pending signatures plus enqueue/coalesce/send counters"""
+    return {"pending": len(_pending), **alert_stats}
@@ -0,0 +1,84 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Size-bounded TTL cache whose loads are coalesced per key (single-flight)"""
+
+    def __init__(self, name, ttl, max_entries):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.pending = {}
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def get(self, key):
+        """Return the cached value, or None if missing/expired"""
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return value
+
+    def set(self, key, value):
+        """Store value, superseding any load for the same key that is still running"""
+        self.pending.pop(key, None)
+        self.entries[key] = (time.monotonic() + self.ttl, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def invalidate(self, key):
+        """Drop key so the next read goes upstream"""
+        self.entries.pop(key, None)
+        self.pending.pop(key, None)
+
+    async def get_or_load(self, key, loader):
+        """Return the cached value or await `loader()`; concurrent misses share one load"""
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        task = self.pending.get(key)
+        if task is None:
+            self.misses += 1
+            task = asyncio.ensure_future(self._load(key, loader))
+            self.pending[key] = task
+        else:
+            self.coalesced += 1
+        # Shield so one cancelled waiter doesn't cancel the load for the others
+        return await asyncio.shield(task)
+
+    async def _load(self, key, loader):
+        current = asyncio.current_task()
+        try:
+            value = await loader()
+            # Falsy results (failed lookups) are not cached; neither are loads
+            # superseded by set()/invalidate() while they were in flight
+            if value and self.pending.get(key) is current:
+                self.set(key, value)
+            return value
+        finally:
+            if self.pending.get(key) is current:
+                del self.pending[key]
+
+    def stats(self):
+        """Snapshot of size and hit/miss counters"""
+        return {
+            "size": len(self.entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+        }
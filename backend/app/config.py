@@ -1,5 +1,18 @@
 import os
 
+# ============== DATABASE ==============
+# Per-engine SQLAlchemy pool (sync + asyncpg engine per process):
+# 2 x (DB_POOL_SIZE + DB_MAX_OVERFLOW) x processes must fit the Postgres connection limit
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
+# Per-request SQL statement count: X-DB-Queries response header, and a log line above the threshold (0 = off)
+DB_QUERY_COUNT_HEADER = os.getenv("DB_QUERY_COUNT_HEADER", "false").lower() == "true"
+DB_QUERY_WARN_THRESHOLD = int(os.getenv("DB_QUERY_WARN_THRESHOLD", "0"))
+
 # ============== SLACK ==============
 SLACK_BOT_TOKEN = os.getenv("SLACK_BOT_TOKEN")
 SLACK_WORKSPACE_DOMAIN = os.getenv("SLACK_WORKSPACE_DOMAIN", "apexdentalstudio")
@@ -11,6 +24,72 @@ MEETINGS_CHANNEL_ID_PIN = "CHRTUSBUN"
 L10VA_CHANNEL_ID = "C05DBULTCPQ"
 BOT_ALERTS_CHANNEL_ID = "C0AJSBTE8MB"
 
+# #bot-alerts pipeline: alerts are coalesced per (function, error) and flushed once per window
+ALERT_WINDOW_SECONDS = float(os.getenv("ALERT_WINDOW_SECONDS", "30"))
+ALERT_MAX_PER_MINUTE = int(os.getenv("ALERT_MAX_PER_MINUTE", "4"))
+ALERT_MAX_SIGNATURES = int(os.getenv("ALERT_MAX_SIGNATURES", "50"))
+
+# ============== HTTP CLIENTS ==============
+# One pooled client per upstream (Slack, Trello), shared for the app's lifetime
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "50"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "false").lower() == "true"
+
+# Outbound rate limiting (Slack tiers are built in; Trello allows 100 requests / 10s per token)
+TRELLO_REQUESTS_PER_10S = int(os.getenv("TRELLO_REQUESTS_PER_10S", "100"))
+RATE_LIMIT_MAX_RETRIES = int(os.getenv("RATE_LIMIT_MAX_RETRIES", "3"))
+
+# ============== SLACK CACHES ==============
+SLACK_USER_CACHE_TTL = int(os.getenv("SLACK_USER_CACHE_TTL", "3600"))
+SLACK_USER_CACHE_MAX_ENTRIES = int(os.getenv("SLACK_USER_CACHE_MAX_ENTRIES", "5000"))
+
+# Full users.list resync of the slack_directory table (team_join/user_change keep it fresh in between)
+SLACK_DIRECTORY_SYNC_INTERVAL = int(os.getenv("SLACK_DIRECTORY_SYNC_INTERVAL", "21600"))
+
+# Background refresh of usergroup handles, channel names and channel ID -> Trello routing
+SLACK_METADATA_REFRESH_INTERVAL = int(os.getenv("SLACK_METADATA_REFRESH_INTERVAL", "900"))
+
+# ============== EVENT QUEUE ==============
+# /slack/events acks immediately; handlers run on this worker pool
+EVENT_QUEUE_WORKERS = int(os.getenv("EVENT_QUEUE_WORKERS", "4"))
+EVENT_QUEUE_MAXSIZE = int(os.getenv("EVENT_QUEUE_MAXSIZE", "500"))
+EVENT_QUEUE_PUT_TIMEOUT = float(os.getenv("EVENT_QUEUE_PUT_TIMEOUT", "0.5"))
+EVENT_QUEUE_DRAIN_TIMEOUT = float(os.getenv("EVENT_QUEUE_DRAIN_TIMEOUT", "25"))
+
+# Event dedup: "memory" (per-process) or "postgres" (shared across workers)
+EVENT_DEDUP_BACKEND = os.getenv("EVENT_DEDUP_BACKEND", "memory")
+EVENT_DEDUP_TTL = int(os.getenv("EVENT_DEDUP_TTL", "3600"))
+EVENT_DEDUP_MAX_ENTRIES = int(os.getenv("EVENT_DEDUP_MAX_ENTRIES", "10000"))
+
+# /slack/praise background completion (delivered via response_url)
+SLACK_COMMAND_WORKERS = int(os.getenv("SLACK_COMMAND_WORKERS", "4"))
+SLACK_COMMAND_QUEUE_MAXSIZE = int(os.getenv("SLACK_COMMAND_QUEUE_MAXSIZE", "200"))
+
+# ============== OUTBOX ==============
+# Durable side-effects (Trello cards, pins, DMs) written as rows and drained by workers
+OUTBOX_WORKERS = int(os.getenv("OUTBOX_WORKERS", "2"))
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "20"))
+OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", "1"))
+OUTBOX_LEASE_SECONDS = int(os.getenv("OUTBOX_LEASE_SECONDS", "120"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+OUTBOX_RETRY_BASE_DELAY = float(os.getenv("OUTBOX_RETRY_BASE_DELAY", "2"))
+OUTBOX_RETRY_MAX_DELAY = float(os.getenv("OUTBOX_RETRY_MAX_DELAY", "300"))
+OUTBOX_RETENTION_DAYS = int(os.getenv("OUTBOX_RETENTION_DAYS", "7"))
+
+# ============== POINTS LEDGER ==============
+# Background job: daily balance snapshot (at UTC midnight) + ledger vs points_balance reconciliation
+LEDGER_JOB_INTERVAL = int(os.getenv("LEDGER_JOB_INTERVAL", "3600"))
+
+# ============== LIVE PRAISE STREAM ==============
+# /praise/stream (SSE): per-process subscriber cap, Last-Event-ID replay buffer, keep-alive comments
+SSE_MAX_CONNECTIONS = int(os.getenv("SSE_MAX_CONNECTIONS", "100"))
+SSE_REPLAY_BUFFER = int(os.getenv("SSE_REPLAY_BUFFER", "200"))
+SSE_SUBSCRIBER_QUEUE = int(os.getenv("SSE_SUBSCRIBER_QUEUE", "100"))
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+
 # ============== TRELLO ==============
 TRELLO_API_KEY = os.getenv("TRELLO_API_KEY")
 TRELLO_TOKEN = os.getenv("TRELLO_TOKEN")
@@ -44,6 +123,11 @@ CHANNEL_TO_TRELLO_LIST = {
     },
 }
 
+# Slack -> Trello image transfers (one trello_attachment outbox step per image)
+IMAGE_TRANSFER_CONCURRENCY = int(os.getenv("IMAGE_TRANSFER_CONCURRENCY", "3"))
+IMAGE_TRANSFER_CHUNK_SIZE = int(os.getenv("IMAGE_TRANSFER_CHUNK_SIZE", str(64 * 1024)))
+IMAGE_MAX_BYTES_PER_CARD = int(os.getenv("IMAGE_MAX_BYTES_PER_CARD", str(50 * 1024 * 1024)))
+
 # ============== VA MAPPING ==============
 # Slack User ID → Trello Member ID
 SLACK_TO_TRELLO_MEMBER = {
@@ -1,7 +1,14 @@
 import os
-from sqlalchemy import create_engine
+import threading
+import time
+from contextvars import ContextVar
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from .config import DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING
 
 # Try DATABASE_PUBLIC_URL first (for Railway), then DATABASE_URL, then local
 SQLALCHEMY_DATABASE_URL = os.environ.get("DATABASE_PUBLIC_URL") or os.environ.get("DATABASE_URL")
@@ -14,12 +21,101 @@ if not SQLALCHEMY_DATABASE_URL:
 if SQLALCHEMY_DATABASE_URL.startswith("postgres://"):
     SQLALCHEMY_DATABASE_URL = SQLALCHEMY_DATABASE_URL.replace("postgres://", "postgresql://", 1)
 
+
+class _CheckoutTimingMixin:
+    """Records how long each pool checkout waited for a free connection"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            with self._stats_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            with self._stats_lock:
+                self.checkouts += 1
+                self.total_wait += waited
+                self.max_wait = max(self.max_wait, waited)
+
+
+class InstrumentedQueuePool(_CheckoutTimingMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_CheckoutTimingMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def _pool_options():
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+def async_database_url(url):
+    """Same database through asyncpg (libpq's sslmode becomes asyncpg's ssl)"""
+    url = make_url(url).set(drivername="postgresql+asyncpg")
+    sslmode = url.query.get("sslmode")
+    if sslmode:
+        url = url.difference_update_query(["sslmode"]).update_query_dict({"ssl": sslmode})
+    return url
+
+
+def build_engine(url=SQLALCHEMY_DATABASE_URL):
+    """Engine with the pool sized and tuned from DB_POOL_* settings"""
+    return create_engine(url, poolclass=InstrumentedQueuePool, **_pool_options())
+
+
+def build_async_engine(url=SQLALCHEMY_DATABASE_URL):
+    """asyncpg engine for the async routes; gets its own pool of the same size"""
+    return create_async_engine(async_database_url(url), poolclass=InstrumentedAsyncQueuePool, **_pool_options())
+
+
 # Create the database engine
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+engine = build_engine()
 
 # Create a session maker
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine/sessions for the hot routes (no threadpool hop, no thread per in-flight query)
+async_engine = build_async_engine()
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+# Statements issued while handling the current request ([count], or None outside a request)
+_request_queries = ContextVar("request_queries", default=None)
+
+
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    counter = _request_queries.get()
+    if counter is not None:
+        counter[0] += 1
+
+
+event.listen(engine, "before_cursor_execute", _count_statement)
+event.listen(async_engine.sync_engine, "before_cursor_execute", _count_statement)
+
+
+def start_query_count():
+    """Begin counting statements for this request; returns the live [count] list"""
+    counter = [0]
+    _request_queries.set(counter)
+    return counter
+
 # Base class for our database models
 Base = declarative_base()
 
@@ -29,4 +125,41 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+def run_migrations():
+    """Upgrade to the latest Alembic revision (indexes/backfills create_all can't apply to existing tables)"""
+    from alembic import command
+    from alembic.config import Config
+    config = Config(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini"))
+    config.attributes["configure_logger"] = False
+    command.upgrade(config, "head")
+
+
+# Async counterpart of get_db
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def pool_stats(pool=None):
+    """Checkout wait times and how close the pool is to exhaustion"""
+    pool = pool or engine.pool
+    capacity = DB_POOL_SIZE + DB_MAX_OVERFLOW
+    checked_out = pool.checkedout()
+    with pool._stats_lock:
+        checkouts, timeouts = pool.checkouts, pool.timeouts
+        total_wait, max_wait = pool.total_wait, pool.max_wait
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "checked_out": checked_out,
+        "checked_in": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "saturation": round(checked_out / capacity, 3) if capacity else None,
+        "checkouts": checkouts,
+        "timeouts": timeouts,
+        "avg_wait_ms": round(total_wait / checkouts * 1000, 2) if checkouts else 0.0,
+        "max_wait_ms": round(max_wait * 1000, 2),
+    }
@@ -0,0 +1,99 @@
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.dialects.postgresql import insert
+from .config import EVENT_DEDUP_BACKEND, EVENT_DEDUP_TTL, EVENT_DEDUP_MAX_ENTRIES
+from .database import SessionLocal
+from . import models
+
+
+class MemoryDedupStore:
+    """Per-process LRU of seen Slack event IDs with a per-entry TTL"""
+
+    def __init__(self, ttl, max_entries):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+
+    async def claim(self, event_id):
+        """Record event_id; returns False if it was already seen within the TTL"""
+        now = time.monotonic()
+        expires_at = self.entries.get(event_id)
+        if expires_at is not None and expires_at > now:
+            self.entries.move_to_end(event_id)
+            return False
+
+        self.entries[event_id] = now + self.ttl
+        self.entries.move_to_end(event_id)
+
+        # Evict expired entries from the cold end, then enforce the size bound
+        while self.entries:
+            oldest_id, oldest_expiry = next(iter(self.entries.items()))
+            if oldest_expiry > now and len(self.entries) <= self.max_entries:
+                break
+            del self.entries[oldest_id]
+        return True
+
+    async def release(self, event_id):
+        """Forget event_id so a redelivery gets processed"""
+        self.entries.pop(event_id, None)
+
+
+class PostgresDedupStore:
+    """Dedup store shared by every worker process via the slack_event_dedup table"""
+
+    purge_every = 100
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self.claims = 0
+
+    def _claim(self, event_id):
+        now = datetime.utcnow()
+        table = models.ProcessedSlackEvent.__table__
+        stmt = insert(table).values(
+            event_id=event_id,
+            expires_at=now + timedelta(seconds=self.ttl),
+        )
+        # Only take over an existing row once it has expired
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.event_id],
+            set_={"expires_at": stmt.excluded.expires_at},
+            where=table.c.expires_at < now,
+        ).returning(table.c.event_id)
+
+        db = SessionLocal()
+        try:
+            claimed = db.execute(stmt).first() is not None
+            self.claims += 1
+            if self.claims % self.purge_every == 0:
+                db.execute(table.delete().where(table.c.expires_at < now))
+            db.commit()
+            return claimed
+        finally:
+            db.close()
+
+    def _release(self, event_id):
+        table = models.ProcessedSlackEvent.__table__
+        db = SessionLocal()
+        try:
+            db.execute(table.delete().where(table.c.event_id == event_id))
+            db.commit()
+        finally:
+            db.close()
+
+    async def claim(self, event_id):
+        """Record event_id; returns False if it was already seen within the TTL"""
+        return await run_in_threadpool(self._claim, event_id)
+
+    async def release(self, event_id):
+        """Forget event_id so a redelivery gets processed"""
+        await run_in_threadpool(self._release, event_id)
+
+
+def make_dedup_store():
+    """Build the dedup store selected by EVENT_DEDUP_BACKEND"""
+    if EVENT_DEDUP_BACKEND == "postgres":
+        return PostgresDedupStore(EVENT_DEDUP_TTL)
+    return MemoryDedupStore(EVENT_DEDUP_TTL, EVENT_DEDUP_MAX_ENTRIES)
@@ -0,0 +1,78 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from fastapi import Response
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from . import models
+
+# Catalogs change rarely: browsers may reuse them for a minute, then revalidate
+CATALOG_CACHE_CONTROL = "public, max-age=60, must-revalidate"
+# Feeds: always revalidate (a 304 is one primary-key read)
+FEED_CACHE_CONTROL = "public, no-cache"
+
+
+def _bump_statement(name):
+    table = models.TableVersion.__table__
+    stmt = insert(table).values(name=name, version=1, updated_at=datetime.utcnow())
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.name],
+        set_={"version": table.c.version + 1, "updated_at": stmt.excluded.updated_at},
+    )
+
+
+def bump_version(db, name):
+    """Mark `name` changed (sync Session; call before the write's commit)"""
+    db.execute(_bump_statement(name))
+
+
+async def bump_version_async(db, name):
+    """Mark `name` changed (AsyncSession; call just before commit to keep the row lock short)"""
+    await db.execute(_bump_statement(name))
+
+
+def _etag(name, version, query):
+    # Different filters/pages of one table are different representations
+    query_hash = hashlib.sha1(query.encode()).hexdigest()[:12]
+    return f'"{name}-{version}-{query_hash}"'
+
+
+def _etag_matches(if_none_match, etag):
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return etag in candidates or f"W/{etag}" in candidates
+
+
+async def not_modified_or_tag(request, response, db, name, cache_control):
+    """Validate the request against `name`'s version.
+
+    Returns a 304 response to send as-is when the client's copy is current (the
+    route then skips its query and serialisation); otherwise sets ETag,
+    Last-Modified and Cache-Control on `response` and returns None.
+    """
+    row = (await db.execute(
+        select(models.TableVersion.version, models.TableVersion.updated_at)
+        .where(models.TableVersion.name == name)
+    )).first()
+    version, updated_at = row if row else (0, None)
+
+    headers = {"ETag": _etag(name, version, request.url.query), "Cache-Control": cache_control}
+    if updated_at:
+        headers["Last-Modified"] = format_datetime(updated_at.replace(tzinfo=timezone.utc), usegmt=True)
+
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match is not None:
+        if _etag_matches(if_none_match, headers["ETag"]):
+            return Response(status_code=304, headers=headers)
+    elif updated_at and request.headers.get("If-Modified-Since"):
+        try:
+            since = parsedate_to_datetime(request.headers["If-Modified-Since"])
+        except (TypeError, ValueError):
+            since = None
+        # HTTP dates have one-second resolution
+        if since and since.tzinfo and updated_at.replace(microsecond=0, tzinfo=timezone.utc) <= since:
+            return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return None
@@ -0,0 +1,80 @@
+import httpx
+from .config import (
+    SLACK_BOT_TOKEN,
+    TRELLO_API_KEY,
+    TRELLO_TOKEN,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    HTTP_KEEPALIVE_EXPIRY,
+    HTTP_TIMEOUT,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP2_ENABLED,
+)
+from .rate_limit import RateLimitedTransport, slack_bucket, trello_bucket
+
+try:
+    import h2  # noqa: F401  (installed via `pip install httpx[http2]`)
+    H2_AVAILABLE = True
+except ImportError:
+    H2_AVAILABLE = False
+
+SLACK_API_URL = "https://slack.com/api/"
+TRELLO_API_URL = "https://api.trello.com/1/"
+
+_clients = {}
+
+
+def _build_client(bucket_for, **kwargs):
+    if HTTP2_ENABLED and not H2_AVAILABLE:
+        print("⚠️ HTTP2_ENABLED is set but the h2 package is missing - falling back to HTTP/1.1")
+    transport = httpx.AsyncHTTPTransport(
+        http2=HTTP2_ENABLED and H2_AVAILABLE,
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        ),
+    )
+    return httpx.AsyncClient(
+        transport=RateLimitedTransport(transport, bucket_for),
+        timeout=httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+        **kwargs,
+    )
+
+
+def get_slack_client():
+    """Shared client for the Slack Web API and file downloads (bot token pre-set)"""
+    client = _clients.get("slack")
+    if client is None or client.is_closed:
+        client = _clients["slack"] = _build_client(
+            slack_bucket,
+            base_url=SLACK_API_URL,
+            headers={"Authorization": f"Bearer {SLACK_BOT_TOKEN}"},
+        )
+    return client
+
+
+def get_trello_client():
+    """Shared client for the Trello REST API (key/token pre-set)"""
+    client = _clients.get("trello")
+    if client is None or client.is_closed:
+        client = _clients["trello"] = _build_client(
+            trello_bucket,
+            base_url=TRELLO_API_URL,
+            params={"key": TRELLO_API_KEY, "token": TRELLO_TOKEN},
+        )
+    return client
+
+
+def start_http_clients():
+    """Open both upstream clients up front (called from the app lifespan)"""
+    get_slack_client()
+    get_trello_client()
+    print(f"🌐 HTTP clients ready (http2={HTTP2_ENABLED and H2_AVAILABLE}, max_connections={HTTP_MAX_CONNECTIONS})")
+
+
+async def close_http_clients():
+    """Close every pooled connection (called from the app lifespan)"""
+    for client in _clients.values():
+        await client.aclose()
+    _clients.clear()
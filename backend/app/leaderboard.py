@@ -0,0 +1,114 @@
+from datetime import datetime, timedelta
+from sqlalchemy import select, text
+from sqlalchemy.dialects.postgresql import insert
+from . import models
+
+PERIODS = ("week", "month", "all")
+ROLES = ("receiver", "giver")
+ALL_CORE_VALUES = 0
+ALL_TIME_START = datetime(1970, 1, 1)
+
+
+def period_start(period, at):
+    """Start of the bucket containing `at` (matches Postgres date_trunc for week/month)"""
+    day = datetime(at.year, at.month, at.day)
+    if period == "week":
+        return day - timedelta(days=day.weekday())
+    if period == "month":
+        return day.replace(day=1)
+    return ALL_TIME_START
+
+
+def _praise_rows(praise, giver_points):
+    rows = []
+    for period in PERIODS:
+        start = period_start(period, praise.created_at)
+        for role, user_id, points in (
+            ("receiver", praise.receiver_id, praise.points_awarded),
+            ("giver", praise.giver_id, giver_points),
+        ):
+            for core_value_id in (ALL_CORE_VALUES, praise.core_value_id):
+                rows.append({
+                    "period": period,
+                    "period_start": start,
+                    "role": role,
+                    "core_value_id": core_value_id,
+                    "user_id": user_id,
+                    "praise_count": 1,
+                    "points": points,
+                })
+    # Same key order in every transaction, so concurrent upserts can't deadlock
+    rows.sort(key=lambda r: (r["period"], r["period_start"], r["role"], r["core_value_id"], r["user_id"]))
+    return rows
+
+
+async def record_in_leaderboard(db, praise, giver_points):
+    """Bump every board this praise counts towards (call inside the praise's transaction)"""
+    table = models.LeaderboardEntry.__table__
+    stmt = insert(table).values(_praise_rows(praise, giver_points))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.period, table.c.period_start, table.c.role, table.c.core_value_id, table.c.user_id],
+        set_={
+            "praise_count": table.c.praise_count + stmt.excluded.praise_count,
+            "points": table.c.points + stmt.excluded.points,
+        },
+    )
+    await db.execute(stmt)
+
+
+async def top_entries(db, period, role, core_value_id=None, at=None, limit=10):
+    """Top `limit` rows of one board - an index range read, independent of praise history size"""
+    start = period_start(period, at or datetime.utcnow())
+    board = models.LeaderboardEntry
+    result = await db.execute(
+        select(board, models.User)
+        .join(models.User, models.User.id == board.user_id)
+        .where(
+            board.period == period,
+            board.period_start == start,
+            board.role == role,
+            board.core_value_id == (core_value_id or ALL_CORE_VALUES),
+        )
+        .order_by(board.praise_count.desc(), board.points.desc(), board.user_id)
+        .limit(limit)
+    )
+    entries = [
+        {
+            "rank": rank,
+            "user_id": user.id,
+            "first_name": user.first_name,
+            "last_name": user.last_name,
+            "praise_count": entry.praise_count,
+            "points": entry.points,
+        }
+        for rank, (entry, user) in enumerate(result.all(), start=1)
+    ]
+    return start, entries
+
+
+REBUILD_SQL = text("""
+    INSERT INTO leaderboard (period, period_start, role, core_value_id, user_id, praise_count, points)
+    SELECT b.period, b.period_start, r.role, cv.core_value_id, r.user_id, COUNT(*), SUM(r.points)
+    FROM praise p
+    CROSS JOIN LATERAL (VALUES
+        ('week', date_trunc('week', p.created_at)),
+        ('month', date_trunc('month', p.created_at)),
+        ('all', TIMESTAMP '1970-01-01')
+    ) AS b(period, period_start)
+    CROSS JOIN LATERAL (VALUES
+        ('receiver', p.receiver_id, p.points_awarded),
+        ('giver', p.giver_id, :giver_points)
+    ) AS r(role, user_id, points)
+    CROSS JOIN LATERAL (VALUES (0), (p.core_value_id)) AS cv(core_value_id)
+    GROUP BY b.period, b.period_start, r.role, cv.core_value_id, r.user_id
+""")
+
+
+def rebuild_leaderboard(db, giver_points):
+    """Recompute every board from the praise table in one transaction (backfill / repair)"""
+    # Praise inserts wait for the rebuild instead of racing it; reads continue
+    db.execute(text("LOCK TABLE leaderboard IN EXCLUSIVE MODE"))
+    db.execute(text("DELETE FROM leaderboard"))
+    rows = db.execute(REBUILD_SQL, {"giver_points": giver_points}).rowcount
+    db.commit()
+    return rows
@@ -1,23 +1,75 @@
+import asyncio
 from contextlib import asynccontextmanager
+from functools import partial
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from . import models
-from .database import engine
-from .slack_endpoints import router as slack_router
+from .config import (
+    EVENT_QUEUE_WORKERS,
+    EVENT_QUEUE_MAXSIZE,
+    EVENT_QUEUE_PUT_TIMEOUT,
+    EVENT_QUEUE_DRAIN_TIMEOUT,
+    OUTBOX_WORKERS,
+    LEDGER_JOB_INTERVAL,
+    DB_QUERY_COUNT_HEADER,
+    DB_QUERY_WARN_THRESHOLD,
+    SLACK_DIRECTORY_SYNC_INTERVAL,
+    SLACK_METADATA_REFRESH_INTERVAL,
+)
+from .database import engine, async_engine, pool_stats, run_migrations, start_query_count
+from .alerts import alert_pipeline_stats, flush_alerts, run_alert_flusher
+from .dedup import make_dedup_store
+from .http_clients import start_http_clients, close_http_clients
+from .outbox import outbox_metrics, start_outbox_workers
+from .points_ledger import run_ledger_jobs_loop
+from .praise_stream import praise_broker
+from .rate_limit import bucket_levels
+from .slack_helpers import user_cache
+from .slack_directory import run_directory_sync_loop, update_slack_directory_member
+from .slack_metadata import apply_metadata_event, refresh_slack_metadata, run_metadata_refresh_loop
+from .slack_endpoints import router as slack_router, command_queue, command_stats
 from .slack_handlers import (
     handle_task_message,
     handle_tta_message,
     handle_announcement_message,
     handle_meetings_pin,
 )
-from .routes import auth, praise, rewards, admin
+from .routes import auth, praise, rewards, admin, leaderboard
+from .workers import WorkerQueue
 
 # ============== APP SETUP ==============
 
+event_queue = WorkerQueue("slack-events", EVENT_QUEUE_WORKERS, EVENT_QUEUE_MAXSIZE)
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     models.Base.metadata.create_all(bind=engine)
+    run_migrations()
+    start_http_clients()
+    alert_flusher = asyncio.create_task(run_alert_flusher())
+    await refresh_slack_metadata()
+    event_queue.start()
+    command_queue.start()
+    outbox_workers = start_outbox_workers(OUTBOX_WORKERS)
+    directory_sync = asyncio.create_task(run_directory_sync_loop(SLACK_DIRECTORY_SYNC_INTERVAL))
+    metadata_refresh = asyncio.create_task(run_metadata_refresh_loop(SLACK_METADATA_REFRESH_INTERVAL))
+    ledger_jobs = asyncio.create_task(run_ledger_jobs_loop(LEDGER_JOB_INTERVAL))
     yield
+    # Open SSE streams would otherwise hold shutdown until they time out
+    praise_broker.close()
+    directory_sync.cancel()
+    metadata_refresh.cancel()
+    ledger_jobs.cancel()
+    await command_queue.stop(EVENT_QUEUE_DRAIN_TIMEOUT)
+    await event_queue.stop(EVENT_QUEUE_DRAIN_TIMEOUT)
+    # Unfinished outbox rows are picked up again once their lease expires
+    for worker in outbox_workers:
+        worker.cancel()
+    alert_flusher.cancel()
+    await flush_alerts()
+    await close_http_clients()
+    await async_engine.dispose()
 
 app = FastAPI(lifespan=lifespan)
 
@@ -35,18 +87,48 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def count_db_queries(request: Request, call_next):
+    """Count SQL statements per request to catch N+1 regressions on list endpoints"""
+    if not (DB_QUERY_COUNT_HEADER or DB_QUERY_WARN_THRESHOLD):
+        return await call_next(request)
+    counter = start_query_count()
+    response = await call_next(request)
+    if DB_QUERY_COUNT_HEADER:
+        response.headers["X-DB-Queries"] = str(counter[0])
+    if DB_QUERY_WARN_THRESHOLD and counter[0] > DB_QUERY_WARN_THRESHOLD:
+        print(f"⚠️ {request.method} {request.url.path} issued {counter[0]} SQL statements (threshold {DB_QUERY_WARN_THRESHOLD})")
+    return response
+
 # ============== ROUTERS ==============
 app.include_router(slack_router)
 app.include_router(auth.router)
 app.include_router(praise.router)
 app.include_router(rewards.router)
 app.include_router(admin.router)
+app.include_router(leaderboard.router)
 
 # ============== DEDUPLICATION ==============
-processed_events = set()
+dedup_store = make_dedup_store()
 
 # ============== SLACK EVENTS ==============
 
+async def dispatch_slack_event(event, event_id=None):
+    """Route a message event to its handlers (runs on the event queue workers)"""
+    message_text = event.get("text", "").upper()
+    # Outbox idempotency keys are derived from this
+    event_id = event_id or f"{event.get('channel')}:{event.get('ts')}"
+
+    if message_text.startswith("TASK"):
+        await handle_task_message(event, event_id)
+    elif "ANNOUNCEMENT" in message_text or "ANNOUCEMENT" in message_text:
+        await handle_announcement_message(event, event_id)
+    elif message_text.startswith("TTA"):
+        await handle_tta_message(event, event_id)
+
+    await handle_meetings_pin(event, event_id)
+
+
 @app.post("/slack/events")
 async def slack_events(request: Request):
     data = await request.json()
@@ -57,28 +139,43 @@ async def slack_events(request: Request):
     if data.get("type") == "event_callback":
         event = data["event"]
 
-        if event.get("bot_id") or event.get("subtype") == "bot_message":
+        # New members / profile edits: refresh the users.info cache and local directory
+        if event.get("type") in ("user_change", "team_join"):
+            user = event.get("user", {})
+            if user.get("id"):
+                user_cache.set(user["id"], user)
+                await event_queue.submit(partial(update_slack_directory_member, user))
             return {"ok": True}
 
-        event_id = data.get("event_id")
-        if event_id in processed_events:
-            print(f"⚠️ Duplicate event {event_id} - skipping")
+        # Channel renames / usergroup edits: keep the metadata caches current
+        if await apply_metadata_event(event):
+            return {"ok": True}
+
+        if event.get("bot_id") or event.get("subtype") == "bot_message":
             return {"ok": True}
 
-        processed_events.add(event_id)
-        if len(processed_events) > 1000:
-            processed_events.clear()
+        event_id = data.get("event_id")
 
-        message_text = event.get("text", "").upper()
+        # Redelivery of something we are still working on - no store lookup needed
+        retry_num = request.headers.get("X-Slack-Retry-Num")
+        if retry_num and event_queue.is_in_flight(event_id):
+            print(f"⚠️ Retry #{retry_num} for in-flight event {event_id} - skipping")
+            return {"ok": True}
 
-        if message_text.startswith("TASK"):
-            await handle_task_message(event)
-        elif "ANNOUNCEMENT" in message_text or "ANNOUCEMENT" in message_text:
-            await handle_announcement_message(event)
-        elif message_text.startswith("TTA"):
-            await handle_tta_message(event)
+        if not await dedup_store.claim(event_id):
+            print(f"⚠️ Duplicate event {event_id} - skipping")
+            return {"ok": True}
 
-        await handle_meetings_pin(event)
+        # Ack now; the handlers can take far longer than Slack's 3s window
+        accepted = await event_queue.submit(
+            partial(dispatch_slack_event, event, event_id),
+            key=event_id,
+            timeout=EVENT_QUEUE_PUT_TIMEOUT,
+        )
+        if not accepted:
+            # Let Slack redeliver once the backlog clears
+            await dedup_store.release(event_id)
+            return JSONResponse(status_code=503, content={"ok": False, "error": "event_queue_full"})
 
     return {"ok": True}
 
@@ -86,4 +183,19 @@ async def slack_events(request: Request):
 
 @app.get("/")
 def read_root():
-    return {"message": "Praise App API is running!"}
\ No newline at end of file
+    return {"message": "Praise App API is running!"}
+
+
+@app.get("/metrics")
+def read_metrics():
+    return {
+        "event_queue": event_queue.stats(),
+        "db_pool": pool_stats(),
+        "db_async_pool": pool_stats(async_engine.sync_engine.pool),
+        "outbox": outbox_metrics(),
+        "praise_stream": praise_broker.metrics(),
+        "slack_commands": command_stats(),
+        "alerts": alert_pipeline_stats(),
+        "rate_limits": bucket_levels(),
+        "user_cache": user_cache.stats(),
+    }
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Text
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Text, JSON, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from .database import Base
@@ -49,6 +49,40 @@ class Praise(Base):
     core_value = relationship("CoreValue", back_populates="praises")
 
 
+# Feed queries: keyset order for /praise, per-receiver and per-giver timelines
+Index("ix_praise_created_at_id", Praise.created_at.desc(), Praise.id.desc())
+Index("ix_praise_receiver_id_created_at", Praise.receiver_id, Praise.created_at.desc())
+Index("ix_praise_giver_id_created_at", Praise.giver_id, Praise.created_at.desc())
+
+
+class LeaderboardEntry(Base):
+    __tablename__ = "leaderboard"
+
+    # One row per (period bucket, role, core value scope, user); maintained with each praise insert
+    period = Column(String, primary_key=True)  # week, month, all
+    period_start = Column(DateTime, primary_key=True)  # Monday / 1st of month (UTC); 1970-01-01 for all
+    role = Column(String, primary_key=True)  # receiver, giver
+    core_value_id = Column(Integer, primary_key=True)  # 0 = across all core values
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    praise_count = Column(Integer, nullable=False, default=0)
+    points = Column(Integer, nullable=False, default=0)
+
+    user = relationship("User")
+
+
+# Top-k read: one board in top_entries' full order (ties included), so no sort step
+Index(
+    "ix_leaderboard_board_rank",
+    LeaderboardEntry.period,
+    LeaderboardEntry.period_start,
+    LeaderboardEntry.role,
+    LeaderboardEntry.core_value_id,
+    LeaderboardEntry.praise_count.desc(),
+    LeaderboardEntry.points.desc(),
+    LeaderboardEntry.user_id,
+)
+
+
 class Reward(Base):
     __tablename__ = "rewards"
     
@@ -62,6 +96,10 @@ class Reward(Base):
     redemptions = relationship("Redemption", back_populates="reward")
 
 
+# /rewards only ever lists active rewards
+Index("ix_rewards_active", Reward.id, postgresql_where=Reward.is_active == True)
+
+
 class Redemption(Base):
     __tablename__ = "redemptions"
     
@@ -74,4 +112,97 @@ class Redemption(Base):
     
     # Relationships
     user = relationship("User", back_populates="redemptions")
-    reward = relationship("Reward", back_populates="redemptions")
\ No newline at end of file
+    reward = relationship("Reward", back_populates="redemptions")
+
+
+# /my-redemptions per user, /admin/redemptions across everyone, both newest first
+Index("ix_redemptions_user_id_redeemed_at", Redemption.user_id, Redemption.redeemed_at.desc())
+Index("ix_redemptions_redeemed_at", Redemption.redeemed_at.desc())
+
+
+class PointsLedgerEntry(Base):
+    __tablename__ = "points_ledger"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    entry_type = Column(String, nullable=False)  # praise_received, praise_given_bonus, redemption, adjustment
+    amount = Column(Integer, nullable=False)  # signed: credits > 0, debits < 0
+    praise_id = Column(Integer, ForeignKey("praise.id"), nullable=True)
+    redemption_id = Column(Integer, ForeignKey("redemptions.id"), nullable=True)
+    note = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (Index("ix_points_ledger_user_id_created_at", "user_id", "created_at"),)
+
+
+class PointsSnapshot(Base):
+    __tablename__ = "points_snapshots"
+
+    # balance = sum of the user's ledger entries with created_at < as_of
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    as_of = Column(DateTime, primary_key=True)
+    balance = Column(Integer, nullable=False)
+
+
+class TableVersion(Base):
+    __tablename__ = "table_versions"
+
+    # Bumped in the same transaction as writes to `name`; drives ETag / Last-Modified
+    name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+
+class ProcessedSlackEvent(Base):
+    __tablename__ = "slack_event_dedup"
+
+    event_id = Column(String, primary_key=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+
+class OutboxMessage(Base):
+    __tablename__ = "outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    idempotency_key = Column(String, unique=True, nullable=False)  # "<event_id>:<step>"
+    kind = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False)
+    depends_on = Column(JSON, default=list)  # keys whose results this step needs first
+    status = Column(String, default="pending")  # pending, processing, done, failed
+    attempts = Column(Integer, default=0)
+    available_at = Column(DateTime, default=datetime.utcnow)  # next attempt / lease expiry
+    result = Column(JSON)
+    last_error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (Index("ix_outbox_status_available_at", "status", "available_at"),)
+
+
+class SlackChannelRoute(Base):
+    """Channel ID -> CHANNEL_TO_TRELLO_LIST key, bound the first time the channel is seen under that name"""
+    __tablename__ = "slack_channel_routes"
+
+    channel_id = Column(String, primary_key=True)
+    route_name = Column(String, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class SlackDirectoryEntry(Base):
+    __tablename__ = "slack_directory"
+
+    slack_id = Column(String, primary_key=True)
+    name = Column(String, index=True)
+    display_name = Column(String, index=True)
+    real_name = Column(String)
+    is_deleted = Column(Boolean, default=False)
+    is_bot = Column(Boolean, default=False)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+    # Registered app user for this Slack account, if any
+    user = relationship(
+        "User",
+        primaryjoin="foreign(SlackDirectoryEntry.slack_id) == User.slack_id",
+        viewonly=True,
+        uselist=False,
+    )
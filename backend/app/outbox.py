@@ -0,0 +1,312 @@
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from .config import (
+    OUTBOX_BATCH_SIZE,
+    OUTBOX_POLL_INTERVAL,
+    OUTBOX_LEASE_SECONDS,
+    OUTBOX_MAX_ATTEMPTS,
+    OUTBOX_RETRY_BASE_DELAY,
+    OUTBOX_RETRY_MAX_DELAY,
+    OUTBOX_RETENTION_DAYS,
+)
+from .alerts import send_alert
+from .database import SessionLocal
+from . import models
+
+# Steps waiting on another step are re-checked after this long (doesn't count as an attempt)
+DEPENDENCY_RECHECK_DELAY = 1.0
+PURGE_INTERVAL = 3600
+
+# kind -> async executor(payload, deps) returning a JSON-serialisable result
+_executors = {}
+_wakeup = asyncio.Event()
+
+outbox_stats = {"enqueued": 0, "claimed": 0, "done": 0, "retried": 0, "deferred": 0, "failed": 0, "lost_lease": 0}
+# kind -> how long rows waited from being recorded to their first claim in this process
+claim_waits = {}
+
+
+def outbox_executor(kind):
+    """Register the coroutine that performs one kind of outbox step"""
+    def register(func):
+        _executors[kind] = func
+        return func
+    return register
+
+
+def intent(key, kind, payload, depends_on=(), alert=None):
+    """Build an outbox row; `alert` is (function, error, context) reported if the step finally fails"""
+    if alert:
+        payload = {**payload, "_alert": list(alert)}
+    return {
+        "idempotency_key": key,
+        "kind": kind,
+        "payload": payload,
+        "depends_on": list(depends_on),
+    }
+
+
+def add_intents(intents, db):
+    """Insert intents in one transaction; keys that already exist (Slack redelivery) are ignored"""
+    if not intents:
+        return 0
+    now = datetime.utcnow()
+    rows = [
+        {**row, "status": "pending", "attempts": 0, "available_at": now, "created_at": now, "updated_at": now}
+        for row in intents
+    ]
+    table = models.OutboxMessage.__table__
+    stmt = insert(table).values(rows).on_conflict_do_nothing(index_elements=[table.c.idempotency_key])
+    inserted = db.execute(stmt).rowcount
+    db.commit()
+    return inserted
+
+
+def _add_in_new_session(intents):
+    db = SessionLocal()
+    try:
+        return add_intents(intents, db)
+    finally:
+        db.close()
+
+
+async def enqueue(intents):
+    """Durably record side-effects and wake the workers"""
+    inserted = await run_in_threadpool(_add_in_new_session, intents)
+    outbox_stats["enqueued"] += inserted
+    if inserted < len(intents):
+        print(f"⚠️ Outbox: {len(intents) - inserted} intent(s) already recorded - skipping duplicates")
+    _wakeup.set()
+    return inserted
+
+
+def _record_claim_wait(kind, seconds):
+    waits = claim_waits.setdefault(kind, {"claims": 0, "total_seconds": 0.0, "max_seconds": 0.0})
+    waits["claims"] += 1
+    waits["total_seconds"] += seconds
+    waits["max_seconds"] = max(waits["max_seconds"], seconds)
+
+
+def _claim_batch(limit):
+    """Lease up to `limit` due rows; other workers skip rows we hold the lock on"""
+    outbox = models.OutboxMessage
+    db = SessionLocal()
+    try:
+        now = datetime.utcnow()
+        # "processing" rows whose lease ran out belong to a worker that died mid-step
+        rows = (
+            db.query(outbox)
+            .filter(outbox.status.in_(("pending", "processing")), outbox.available_at <= now)
+            .order_by(outbox.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+
+        dep_keys = {key for row in rows for key in (row.depends_on or [])}
+        deps = {}
+        if dep_keys:
+            deps = {
+                key: (status, result)
+                for key, status, result in db.query(outbox.idempotency_key, outbox.status, outbox.result)
+                .filter(outbox.idempotency_key.in_(dep_keys))
+            }
+
+        claimed = []
+        for row in rows:
+            # A key with no row was purged after it finished (or never recorded) - treat it as failed, not pending
+            missing = [key for key in (row.depends_on or []) if key not in deps]
+            if missing:
+                print(f"⚠️ Outbox {row.idempotency_key} depends on unknown step(s) {missing} - running without them")
+            waiting = [key for key in (row.depends_on or []) if key in deps and deps[key][0] in ("pending", "processing")]
+            if waiting:
+                row.status = "pending"
+                row.available_at = now + timedelta(seconds=DEPENDENCY_RECHECK_DELAY)
+                outbox_stats["deferred"] += 1
+                continue
+
+            if row.attempts == 0:
+                _record_claim_wait(row.kind, (now - row.created_at).total_seconds())
+            row.status = "processing"
+            row.attempts += 1
+            row.available_at = now + timedelta(seconds=OUTBOX_LEASE_SECONDS)
+            row.updated_at = now
+            claimed.append({
+                "id": row.id,
+                "key": row.idempotency_key,
+                "kind": row.kind,
+                "payload": row.payload,
+                "attempts": row.attempts,
+                # Outcomes are only written while this lease is still ours
+                "lease": row.available_at,
+                # Failed dependencies are left out; the step runs with whatever did succeed
+                "deps": {
+                    key: deps[key][1]
+                    for key in (row.depends_on or [])
+                    if key in deps and deps[key][0] == "done"
+                },
+            })
+        db.commit()
+        return claimed
+    finally:
+        db.close()
+
+
+def _retry_delay(attempt):
+    delay = min(OUTBOX_RETRY_MAX_DELAY, OUTBOX_RETRY_BASE_DELAY * 2 ** (attempt - 1))
+    return random.uniform(delay / 2, delay)
+
+
+def _record_outcome(row_id, lease, result=None, error=None, attempts=0):
+    """Write a step's outcome; returns the new status, or None if the lease expired and the row was re-claimed"""
+    outbox = models.OutboxMessage
+    db = SessionLocal()
+    try:
+        now = datetime.utcnow()
+        values = {"updated_at": now}
+        if error is None:
+            values.update(status="done", result=result, last_error=None)
+        else:
+            values["last_error"] = error
+            if attempts >= OUTBOX_MAX_ATTEMPTS:
+                values["status"] = "failed"
+            else:
+                values.update(status="pending", available_at=now + timedelta(seconds=_retry_delay(attempts)))
+        # A claim sets a fresh lease, so a matching available_at means no other worker took the row since
+        updated = (
+            db.query(outbox)
+            .filter(outbox.id == row_id, outbox.status == "processing", outbox.available_at == lease)
+            .update(values, synchronize_session=False)
+        )
+        db.commit()
+        return values["status"] if updated else None
+    finally:
+        db.close()
+
+
+async def _execute(job):
+    executor = _executors.get(job["kind"])
+    start = time.perf_counter()
+    try:
+        if executor is None:
+            raise RuntimeError(f"no executor registered for {job['kind']}")
+        payload = {k: v for k, v in job["payload"].items() if k != "_alert"}
+        result = await executor(payload, job["deps"])
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        status = await run_in_threadpool(_record_outcome, job["id"], job["lease"], error=error, attempts=job["attempts"])
+        if status is None:
+            outbox_stats["lost_lease"] += 1
+            print(f"⚠️ Outbox {job['key']} lease expired before it failed - leaving the row to its new owner")
+        elif status == "failed":
+            outbox_stats["failed"] += 1
+            print(f"❌ Outbox {job['key']} gave up after {job['attempts']} attempts: {error}")
+            function_name, message, context = job["payload"].get(
+                "_alert", ("outbox", f"{job['kind']} failed after max retries", {"Key": job["key"]})
+            )
+            send_alert(function_name, message, {**context, "Error": error})
+        else:
+            outbox_stats["retried"] += 1
+            print(f"⏳ Outbox {job['key']} attempt {job['attempts']}/{OUTBOX_MAX_ATTEMPTS} failed: {error}")
+        return
+
+    if await run_in_threadpool(_record_outcome, job["id"], job["lease"], result=result) is None:
+        outbox_stats["lost_lease"] += 1
+        print(f"⚠️ Outbox {job['key']} finished after its lease expired - the row was re-claimed, outcome not recorded")
+        return
+    outbox_stats["done"] += 1
+    print(f"⏱️ Outbox {job['key']} took {(time.perf_counter() - start) * 1000:.0f}ms")
+    # Steps that depend on this one can run now
+    _wakeup.set()
+
+
+def _purge_finished():
+    outbox = models.OutboxMessage
+    db = SessionLocal()
+    try:
+        cutoff = datetime.utcnow() - timedelta(days=OUTBOX_RETENTION_DAYS)
+        deleted = (
+            db.query(outbox)
+            .filter(outbox.status.in_(("done", "failed")), outbox.updated_at < cutoff)
+            .delete(synchronize_session=False)
+        )
+        db.commit()
+        return deleted
+    finally:
+        db.close()
+
+
+async def run_outbox_worker(worker_id):
+    """Claim due rows in batches and run them concurrently; safe to run in several processes"""
+    last_purge = None
+    while True:
+        try:
+            if worker_id == 0 and (last_purge is None or time.monotonic() - last_purge > PURGE_INTERVAL):
+                last_purge = time.monotonic()
+                await run_in_threadpool(_purge_finished)
+
+            _wakeup.clear()
+            jobs = await run_in_threadpool(_claim_batch, OUTBOX_BATCH_SIZE)
+            outbox_stats["claimed"] += len(jobs)
+            if jobs:
+                await asyncio.gather(*(_execute(job) for job in jobs))
+                continue
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"❌ Outbox worker {worker_id} crashed: {type(e).__name__}: {e}")
+            send_alert("run_outbox_worker", "Outbox worker crashed", {"Error": str(e)})
+
+        try:
+            await asyncio.wait_for(_wakeup.wait(), OUTBOX_POLL_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+
+
+def start_outbox_workers(count):
+    """Start `count` worker tasks (called from the app lifespan)"""
+    return [asyncio.create_task(run_outbox_worker(i)) for i in range(count)]
+
+
+def _queue_depths():
+    """Pending/processing rows per kind across every process, with the age of the oldest pending one"""
+    outbox = models.OutboxMessage
+    db = SessionLocal()
+    try:
+        return (
+            db.query(outbox.kind, outbox.status, func.count(), func.min(outbox.created_at))
+            .filter(outbox.status.in_(("pending", "processing")))
+            .group_by(outbox.kind, outbox.status)
+            .all()
+        )
+    finally:
+        db.close()
+
+
+def outbox_metrics():
+    """Counters for this process, plus queue depth and claim wait per kind"""
+    now = datetime.utcnow()
+    queues = {}
+
+    def queue_for(kind):
+        return queues.setdefault(kind, {"pending": 0, "processing": 0, "oldest_pending_seconds": None})
+
+    for kind in _executors:
+        queue_for(kind)
+    for kind, status, count, oldest in _queue_depths():
+        queue = queue_for(kind)
+        queue[status] = count
+        if status == "pending":
+            queue["oldest_pending_seconds"] = round((now - oldest).total_seconds(), 1)
+    for kind, waits in claim_waits.items():
+        queue_for(kind).update(
+            claims=waits["claims"],
+            avg_claim_wait_seconds=round(waits["total_seconds"] / waits["claims"], 3),
+            max_claim_wait_seconds=round(waits["max_seconds"], 3),
+        )
+    return {**outbox_stats, "kinds": sorted(_executors), "queues": queues}
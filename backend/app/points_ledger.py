@@ -0,0 +1,148 @@
+import asyncio
+from datetime import datetime, time as dt_time, timedelta
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, text
+from .alerts import send_alert
+from .database import SessionLocal
+from . import models
+
+ENTRY_TYPES = ("praise_received", "praise_given_bonus", "redemption", "adjustment")
+
+# Only one process takes snapshots / reconciles per run
+LEDGER_JOB_LOCK_ID = 728312
+# Snapshot a midnight only once it is this old, so transactions in flight across it have committed
+SNAPSHOT_LAG = timedelta(hours=1)
+
+
+def ledger_entry(user_id, entry_type, amount, praise_id=None, redemption_id=None, note=None):
+    """A ledger row to add in the same transaction as the balance change it records"""
+    return models.PointsLedgerEntry(
+        user_id=user_id,
+        entry_type=entry_type,
+        amount=amount,
+        praise_id=praise_id,
+        redemption_id=redemption_id,
+        note=note,
+    )
+
+
+def balance_at(user_id, at, db):
+    """Balance just before `at`: latest snapshot at or before it, plus the ledger entries since"""
+    snapshot = (
+        db.query(models.PointsSnapshot)
+        .filter(models.PointsSnapshot.user_id == user_id, models.PointsSnapshot.as_of <= at)
+        .order_by(models.PointsSnapshot.as_of.desc())
+        .first()
+    )
+    entries = db.query(func.coalesce(func.sum(models.PointsLedgerEntry.amount), 0)).filter(
+        models.PointsLedgerEntry.user_id == user_id,
+        models.PointsLedgerEntry.created_at < at,
+    )
+    if snapshot:
+        entries = entries.filter(models.PointsLedgerEntry.created_at >= snapshot.as_of)
+    return (snapshot.balance if snapshot else 0) + entries.scalar()
+
+
+def points_history(user_id, since, until, db):
+    """Opening/closing balance for [since, until) and what was earned or spent in between, by type"""
+    ledger = models.PointsLedgerEntry
+    totals = dict(
+        db.query(ledger.entry_type, func.sum(ledger.amount))
+        .filter(ledger.user_id == user_id, ledger.created_at >= since, ledger.created_at < until)
+        .group_by(ledger.entry_type)
+        .all()
+    )
+    return {
+        "user_id": user_id,
+        "since": since,
+        "until": until,
+        "opening_balance": balance_at(user_id, since, db),
+        "closing_balance": balance_at(user_id, until, db),
+        "by_type": {entry_type: totals.get(entry_type, 0) for entry_type in ENTRY_TYPES},
+    }
+
+
+SNAPSHOT_SQL = text("""
+    INSERT INTO points_snapshots (user_id, as_of, balance)
+    SELECT u.id, :as_of,
+           COALESCE(prev.balance, 0) + COALESCE((
+               SELECT SUM(l.amount) FROM points_ledger l
+               WHERE l.user_id = u.id
+                 AND l.created_at >= COALESCE(prev.as_of, '-infinity'::timestamp)
+                 AND l.created_at < :as_of
+           ), 0)
+    FROM users u
+    LEFT JOIN LATERAL (
+        SELECT s.as_of, s.balance FROM points_snapshots s
+        WHERE s.user_id = u.id AND s.as_of < :as_of
+        ORDER BY s.as_of DESC LIMIT 1
+    ) prev ON true
+    ON CONFLICT (user_id, as_of) DO NOTHING
+""")
+
+DRIFT_SQL = text("""
+    SELECT u.id AS user_id, u.points_balance, COALESCE(SUM(l.amount), 0) AS ledger_balance
+    FROM users u
+    LEFT JOIN points_ledger l ON l.user_id = u.id
+    GROUP BY u.id, u.points_balance
+    HAVING u.points_balance <> COALESCE(SUM(l.amount), 0)
+    ORDER BY u.id
+""")
+
+
+def take_snapshots(as_of, db):
+    """Snapshot every user's balance at `as_of`, each built from their previous snapshot (idempotent)"""
+    inserted = db.execute(SNAPSHOT_SQL, {"as_of": as_of}).rowcount
+    db.commit()
+    return inserted
+
+
+def find_drift(db):
+    """Users whose points_balance doesn't equal the sum of their ledger entries (one aggregate query)"""
+    return [
+        {
+            "user_id": row.user_id,
+            "points_balance": row.points_balance,
+            "ledger_balance": row.ledger_balance,
+            "drift": row.points_balance - row.ledger_balance,
+        }
+        for row in db.execute(DRIFT_SQL)
+    ]
+
+
+def _run_ledger_jobs():
+    db = SessionLocal()
+    try:
+        if not db.execute(text("SELECT pg_try_advisory_lock(:id)"), {"id": LEDGER_JOB_LOCK_ID}).scalar():
+            db.rollback()
+            return None
+        try:
+            as_of = datetime.combine((datetime.utcnow() - SNAPSHOT_LAG).date(), dt_time.min)
+            snapshots = take_snapshots(as_of, db)
+            drift = find_drift(db)
+            db.commit()
+        finally:
+            db.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": LEDGER_JOB_LOCK_ID})
+            db.commit()
+        return snapshots, drift
+    finally:
+        db.close()
+
+
+async def run_ledger_jobs_loop(interval):
+    """Snapshot and reconcile at startup and then every `interval` seconds"""
+    while True:
+        try:
+            outcome = await run_in_threadpool(_run_ledger_jobs)
+            if outcome:
+                snapshots, drift = outcome
+                if snapshots:
+                    print(f"📒 Points snapshots taken for {snapshots} user(s)")
+                if drift:
+                    print(f"❌ Points ledger drift for {len(drift)} user(s)")
+                    sample = ", ".join(f"user {d['user_id']}: {d['drift']:+d}" for d in drift[:5])
+                    send_alert("run_ledger_jobs_loop", "points_balance does not match the ledger", {"Users": len(drift), "Sample": sample})
+        except Exception as e:
+            print(f"❌ Points ledger job crashed: {type(e).__name__}: {e}")
+            send_alert("run_ledger_jobs_loop", "Points ledger job crashed", {"Error": str(e)})
+        await asyncio.sleep(interval)
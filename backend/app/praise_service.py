@@ -0,0 +1,90 @@
+from sqlalchemy import update
+from sqlalchemy.orm.attributes import set_committed_value
+from . import models
+from .http_cache import bump_version_async
+from .leaderboard import record_in_leaderboard
+from .points_ledger import ledger_entry
+from .praise_stream import publish_praise
+
+PRAISE_POINTS = 10  # to the receiver
+GIVER_POINTS = 5    # to the giver, for recognising someone
+
+
+class NotEnoughPoints(Exception):
+    pass
+
+
+async def _add_points(db, user, delta):
+    """points_balance += delta as one SQL statement (no read-modify-write across round trips)"""
+    result = await db.execute(
+        update(models.User)
+        .where(models.User.id == user.id)
+        .values(points_balance=models.User.points_balance + delta)
+        .returning(models.User.points_balance)
+        .execution_options(synchronize_session=False)
+    )
+    # Reflect the new balance without marking the object dirty
+    set_committed_value(user, "points_balance", result.scalar_one())
+
+
+async def record_praise(db, giver, receiver, core_value, message):
+    """Insert a praise, award points, and write ledger entries and leaderboard counts in one short transaction"""
+    new_praise = models.Praise(
+        giver=giver,
+        receiver=receiver,
+        message=message,
+        core_value=core_value,
+        points_awarded=PRAISE_POINTS
+    )
+    db.add(new_praise)
+    await db.flush()
+    # Lock rows in id order so concurrent A->B and B->A praise can't deadlock
+    awards = sorted(
+        [(receiver, PRAISE_POINTS, "praise_received"), (giver, GIVER_POINTS, "praise_given_bonus")],
+        key=lambda award: award[0].id,
+    )
+    for user, delta, entry_type in awards:
+        await _add_points(db, user, delta)
+        db.add(ledger_entry(user.id, entry_type, delta, praise_id=new_praise.id))
+    await record_in_leaderboard(db, new_praise, GIVER_POINTS)
+    await bump_version_async(db, "praise")
+    await db.commit()
+    # Only committed praise reaches live dashboards; a publish error mustn't make a recorded praise look failed
+    try:
+        publish_praise(new_praise)
+    except Exception as e:
+        print(f"⚠️ Praise {new_praise.id} recorded but not published to the stream: {type(e).__name__}: {e}")
+    return new_praise
+
+
+async def redeem_reward(db, user, reward):
+    """Deduct the reward's cost only if the balance covers it, then record the redemption.
+
+    Raises NotEnoughPoints (nothing changed) when the conditional update matches no row.
+    """
+    result = await db.execute(
+        update(models.User)
+        .where(models.User.id == user.id, models.User.points_balance >= reward.point_cost)
+        .values(points_balance=models.User.points_balance - reward.point_cost)
+        .returning(models.User.points_balance)
+        .execution_options(synchronize_session=False)
+    )
+    new_balance = result.scalar_one_or_none()
+    if new_balance is None:
+        await db.rollback()
+        raise NotEnoughPoints()
+    set_committed_value(user, "points_balance", new_balance)
+
+    new_redemption = models.Redemption(
+        user_id=user.id,
+        reward=reward,
+        points_spent=reward.point_cost,
+        status="pending"
+    )
+    db.add(new_redemption)
+    await db.flush()
+    db.add(ledger_entry(user.id, "redemption", -reward.point_cost, redemption_id=new_redemption.id))
+    # The praise feed embeds users' balances, so its cached copies are stale too
+    await bump_version_async(db, "praise")
+    await db.commit()
+    return new_redemption
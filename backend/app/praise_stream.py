@@ -0,0 +1,150 @@
+import asyncio
+import secrets
+from collections import deque
+from .config import SSE_MAX_CONNECTIONS, SSE_REPLAY_BUFFER, SSE_SUBSCRIBER_QUEUE, SSE_HEARTBEAT_SECONDS
+from . import schemas
+
+# Browsers wait this long before reconnecting (and then send Last-Event-ID)
+RETRY_MS = 3000
+
+
+class TooManySubscribers(Exception):
+    pass
+
+
+class Subscriber:
+    def __init__(self, queue_size, start_id):
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = False
+        # Broker position when this subscriber joined; everything later arrives on the queue
+        self.start_id = start_id
+
+
+class PraiseBroker:
+    """In-process fan-out of new praise to SSE subscribers, with a ring buffer for resume.
+
+    Event IDs are "<epoch>-<seq>": seq counts publishes in publish order, and the
+    random epoch changes with every process, so an ID from before a restart (or
+    from another process) is recognised as one we can't resume from.
+    """
+
+    def __init__(self, buffer_size, max_subscribers, queue_size):
+        self.epoch = secrets.token_hex(4)
+        self.seq = 0
+        self.buffer = deque(maxlen=buffer_size)  # (seq, event id, JSON payload), oldest first
+        self.subscribers = set()
+        self.max_subscribers = max_subscribers
+        self.queue_size = queue_size
+        self.stats = {"published": 0, "delivered": 0, "replayed": 0, "reset": 0, "rejected": 0, "dropped_slow": 0}
+
+    def _event_id(self, seq):
+        return f"{self.epoch}-{seq}"
+
+    def position(self):
+        """ID of the latest event published (a resume point even before any praise arrives)"""
+        return self._event_id(self.seq)
+
+    def publish(self, data):
+        self.seq += 1
+        event_id = self._event_id(self.seq)
+        self.buffer.append((self.seq, event_id, data))
+        self.stats["published"] += 1
+        for subscriber in list(self.subscribers):
+            try:
+                subscriber.queue.put_nowait((event_id, data))
+                self.stats["delivered"] += 1
+            except asyncio.QueueFull:
+                # A client that can't keep up is disconnected; it resumes from Last-Event-ID
+                subscriber.dropped = True
+                self.subscribers.discard(subscriber)
+                self.stats["dropped_slow"] += 1
+
+    def _resume_after(self, last_event_id):
+        """seq to replay after, or None unless every event since `last_event_id` is still buffered"""
+        epoch, _, seq = last_event_id.partition("-")
+        if epoch != self.epoch or not seq.isdigit():
+            return None
+        seq = int(seq)
+        if seq > self.seq:
+            return None
+        oldest = self.buffer[0][0] if self.buffer else self.seq + 1
+        return seq if seq + 1 >= oldest else None
+
+    def subscribe(self, last_event_id=None):
+        """Register a subscriber; returns (subscriber, events to replay, whether the client must refetch)"""
+        if len(self.subscribers) >= self.max_subscribers:
+            self.stats["rejected"] += 1
+            raise TooManySubscribers()
+        subscriber = Subscriber(self.queue_size, self.position())
+        self.subscribers.add(subscriber)
+
+        replay, reset = [], False
+        if last_event_id is not None:
+            after = self._resume_after(last_event_id)
+            if after is None:
+                reset = True
+                self.stats["reset"] += 1
+            else:
+                replay = [(event_id, data) for seq, event_id, data in self.buffer if seq > after]
+                self.stats["replayed"] += len(replay)
+        return subscriber, replay, reset
+
+    def unsubscribe(self, subscriber):
+        self.subscribers.discard(subscriber)
+
+    def close(self):
+        """End every open stream (shutdown)"""
+        for subscriber in list(self.subscribers):
+            subscriber.dropped = True
+            try:
+                subscriber.queue.put_nowait(None)
+            except asyncio.QueueFull:
+                pass
+        self.subscribers.clear()
+
+    def metrics(self):
+        return {"subscribers": len(self.subscribers), "buffered": len(self.buffer), "position": self.position(), **self.stats}
+
+
+praise_broker = PraiseBroker(SSE_REPLAY_BUFFER, SSE_MAX_CONNECTIONS, SSE_SUBSCRIBER_QUEUE)
+
+
+def publish_praise(praise):
+    """Announce a committed praise to live dashboards"""
+    data = schemas.PraiseResponse.model_validate(praise).model_dump_json()
+    praise_broker.publish(data)
+
+
+def _format_event(event_id, data, event="praise"):
+    return f"id: {event_id}\nevent: {event}\ndata: {data}\n\n"
+
+
+async def praise_events(subscriber, replay, reset):
+    """SSE body: replay, then live events, with a comment line as heartbeat when idle"""
+    try:
+        yield f"retry: {RETRY_MS}\n\n"
+        if reset:
+            # Continuity from Last-Event-ID can't be proven - client should refetch /praise
+            yield f"id: {subscriber.start_id}\nevent: reset\ndata: {{}}\n\n"
+        elif not replay:
+            # Give the browser a resume point even if no praise arrives before it reconnects
+            yield f"id: {subscriber.start_id}\n\n"
+        for event_id, data in replay:
+            yield _format_event(event_id, data)
+        while not subscriber.dropped:
+            try:
+                item = await asyncio.wait_for(subscriber.queue.get(), SSE_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": heartbeat\n\n"
+                continue
+            if item is None:
+                break
+            yield _format_event(*item)
+        # Flush whatever was queued before a slow-consumer drop
+        while not subscriber.queue.empty():
+            item = subscriber.queue.get_nowait()
+            if item is None:
+                break
+            yield _format_event(*item)
+    finally:
+        praise_broker.unsubscribe(subscriber)
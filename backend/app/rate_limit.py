@@ -0,0 +1,163 @@
+import asyncio
+import json
+import time
+import httpx
+from .config import TRELLO_REQUESTS_PER_10S, RATE_LIMIT_MAX_RETRIES
+
+# Requests per minute for each Slack Web API tier
+SLACK_TIER_LIMITS = {1: 1, 2: 20, 3: 50, 4: 100}
+
+SLACK_METHOD_TIERS = {
+    "users.info": 4,
+    "files.info": 4,
+    "users.list": 2,
+    "usergroups.list": 2,
+    "conversations.list": 2,
+    "pins.add": 2,
+    "conversations.info": 3,
+    "conversations.history": 3,
+    "conversations.open": 3,
+}
+DEFAULT_SLACK_TIER = 3
+
+# chat.postMessage is limited per channel (about one message per second) rather than by tier
+POST_MESSAGE_PER_CHANNEL_PER_MINUTE = 60
+
+
+class TokenBucket:
+    """Token bucket that makes callers wait for capacity instead of failing"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate  # tokens per second
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = asyncio.Lock()
+
+        # Metrics
+        self.waiting = 0
+        self.throttled = 0
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        """Wait (FIFO) until a token is available and any Retry-After pause has passed"""
+        self.waiting += 1
+        try:
+            async with self.lock:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    wait = self.blocked_until - now
+                    if wait <= 0:
+                        if self.tokens >= 1:
+                            self.tokens -= 1
+                            return
+                        wait = (1 - self.tokens) / self.rate
+                    await asyncio.sleep(wait)
+        finally:
+            self.waiting -= 1
+
+    def pause(self, seconds):
+        """Honor an upstream Retry-After: no requests for `seconds`, and start empty afterwards"""
+        self.throttled += 1
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+        self.tokens = 0
+
+    def level(self):
+        """Current fill level and queue for metrics"""
+        now = time.monotonic()
+        self._refill(now)
+        return {
+            "tokens": round(self.tokens, 2),
+            "capacity": self.capacity,
+            "rate_per_sec": round(self.rate, 3),
+            "waiting": self.waiting,
+            "paused_for_sec": round(max(self.blocked_until - now, 0), 1),
+            "throttled": self.throttled,
+        }
+
+
+_buckets = {}
+
+
+def _bucket(key, per_minute=None, rate=None, capacity=None):
+    bucket = _buckets.get(key)
+    if bucket is None:
+        if per_minute is not None:
+            rate = per_minute / 60
+            capacity = max(1, per_minute // 4)
+        bucket = _buckets[key] = TokenBucket(rate, capacity)
+    return bucket
+
+
+def slack_bucket(request):
+    """Bucket for a Slack Web API call (per method, per channel for chat.postMessage)"""
+    if request.url.host != "slack.com" or not request.url.path.startswith("/api/"):
+        # File downloads and response_url posts aren't tiered
+        return None
+    method = request.url.path[len("/api/"):]
+    if method == "chat.postMessage":
+        try:
+            channel = json.loads(request.content).get("channel", "")
+        except (ValueError, AttributeError, httpx.RequestNotRead):
+            channel = ""
+        return _bucket(f"slack:chat.postMessage:{channel}", per_minute=POST_MESSAGE_PER_CHANNEL_PER_MINUTE)
+    tier = SLACK_METHOD_TIERS.get(method, DEFAULT_SLACK_TIER)
+    return _bucket(f"slack:{method}", per_minute=SLACK_TIER_LIMITS[tier])
+
+
+def trello_bucket(request):
+    """Bucket for the Trello token: at most TRELLO_REQUESTS_PER_10S in any 10s window"""
+    # Burst + refill over 10s must not exceed the limit: 20% burst, 80% steady rate
+    return _bucket(
+        "trello:token",
+        rate=TRELLO_REQUESTS_PER_10S * 0.8 / 10,
+        capacity=max(1, int(TRELLO_REQUESTS_PER_10S * 0.2)),
+    )
+
+
+def _retry_after_seconds(response):
+    try:
+        return max(float(response.headers.get("Retry-After", "1")), 0.0)
+    except ValueError:
+        return 1.0
+
+
+class RateLimitedTransport(httpx.AsyncBaseTransport):
+    """Wraps a transport: waits on the request's bucket, and on 429 pauses the bucket and retries"""
+
+    def __init__(self, transport, bucket_for):
+        self.transport = transport
+        self.bucket_for = bucket_for
+
+    async def handle_async_request(self, request):
+        bucket = self.bucket_for(request)
+        # Streamed bodies (image uploads) can't be replayed
+        replayable = isinstance(request.stream, httpx.ByteStream)
+        attempt = 0
+        while True:
+            if bucket is not None:
+                await bucket.acquire()
+            response = await self.transport.handle_async_request(request)
+            if response.status_code != 429 or bucket is None:
+                return response
+
+            retry_after = _retry_after_seconds(response)
+            bucket.pause(retry_after)
+            print(f"⏳ 429 from {request.url.host}{request.url.path} - pausing bucket for {retry_after:.0f}s")
+            if not replayable or attempt >= RATE_LIMIT_MAX_RETRIES:
+                return response
+            await response.aclose()
+            attempt += 1
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+def bucket_levels():
+    """Current level of every bucket created so far"""
+    return {key: bucket.level() for key, bucket in sorted(_buckets.items())}
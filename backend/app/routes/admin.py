@@ -1,7 +1,10 @@
+from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session, joinedload
-from .. import models, schemas, auth
+from .. import models, schemas, auth, points_ledger, leaderboard
+from ..praise_service import GIVER_POINTS
 from ..database import get_db
+from ..http_cache import bump_version
 
 router = APIRouter(prefix="/admin")
 
@@ -23,6 +26,7 @@ def admin_create_core_value(
 ):
     core_value = models.CoreValue(name=name, description=description)
     db.add(core_value)
+    bump_version(db, "core_values")
     db.commit()
     db.refresh(core_value)
     return core_value
@@ -38,6 +42,7 @@ def admin_delete_core_value(
     if not core_value:
         raise HTTPException(status_code=404, detail="Core value not found")
     db.delete(core_value)
+    bump_version(db, "core_values")
     db.commit()
     return {"message": "Core value deleted"}
 
@@ -54,6 +59,7 @@ def admin_create_reward(
         point_cost=reward.point_cost
     )
     db.add(new_reward)
+    bump_version(db, "rewards")
     db.commit()
     db.refresh(new_reward)
     return new_reward
@@ -69,6 +75,7 @@ def admin_delete_reward(
     if not reward:
         raise HTTPException(status_code=404, detail="Reward not found")
     db.delete(reward)
+    bump_version(db, "rewards")
     db.commit()
     return {"message": "Reward deleted"}
 
@@ -95,4 +102,37 @@ def admin_get_all_redemptions(
     return db.query(models.Redemption).options(
         joinedload(models.Redemption.reward),
         joinedload(models.Redemption.user)
-    ).order_by(models.Redemption.redeemed_at.desc()).all()
\ No newline at end of file
+    ).order_by(models.Redemption.redeemed_at.desc()).all()
+
+
+@router.get("/users/{user_id}/points")
+def admin_get_points_history(
+    user_id: int,
+    since: datetime,
+    until: datetime,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    if not db.query(models.User.id).filter(models.User.id == user_id).first():
+        raise HTTPException(status_code=404, detail="User not found")
+    if until <= since:
+        raise HTTPException(status_code=400, detail="until must be after since")
+    return points_ledger.points_history(user_id, since, until, db)
+
+
+@router.get("/points/drift")
+def admin_get_points_drift(
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    drift = points_ledger.find_drift(db)
+    return {"users_with_drift": len(drift), "drift": drift}
+
+
+@router.post("/leaderboard/rebuild")
+def admin_rebuild_leaderboard(
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    rows = leaderboard.rebuild_leaderboard(db, GIVER_POINTS)
+    return {"message": "Leaderboard rebuilt", "rows": rows}
\ No newline at end of file
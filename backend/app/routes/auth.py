@@ -60,7 +60,7 @@ def token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
 
 
 @router.get("/me", response_model=schemas.UserResponse)
-def get_me(current_user: models.User = Depends(auth.get_current_user)):
+async def get_me(current_user: models.User = Depends(auth.get_current_user_async)):
     return current_user
 
 
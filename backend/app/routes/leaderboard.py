@@ -0,0 +1,29 @@
+from datetime import datetime, timezone
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from .. import schemas, leaderboard
+from ..database import get_async_db
+
+router = APIRouter()
+
+
+@router.get("/leaderboard", response_model=schemas.LeaderboardResponse)
+async def get_leaderboard(
+    period: Literal["week", "month", "all"] = "week",
+    role: Literal["receiver", "giver"] = "receiver",
+    core_value_id: Optional[int] = None,
+    at: Optional[datetime] = None,
+    limit: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db)
+):
+    if at is not None and at.tzinfo is not None:
+        at = at.astimezone(timezone.utc).replace(tzinfo=None)
+    start, entries = await leaderboard.top_entries(db, period, role, core_value_id, at, limit)
+    return {
+        "period": period,
+        "period_start": start,
+        "role": role,
+        "core_value_id": core_value_id,
+        "entries": entries,
+    }
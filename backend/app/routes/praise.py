@@ -1,7 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from .. import models, schemas, auth
-from ..database import get_db
+import base64
+from datetime import datetime, timezone
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
+from .. import models, schemas, auth, praise_service
+from ..database import get_db, get_async_db
+from ..http_cache import CATALOG_CACHE_CONTROL, FEED_CACHE_CONTROL, bump_version, not_modified_or_tag
+from ..praise_stream import TooManySubscribers, praise_broker, praise_events
 
 router = APIRouter()
 
@@ -15,57 +23,146 @@ def create_core_value(
 ):
     core_value = models.CoreValue(name=name, description=description)
     db.add(core_value)
+    bump_version(db, "core_values")
     db.commit()
     db.refresh(core_value)
     return core_value
 
 
 @router.get("/core-values")
-def get_core_values(db: Session = Depends(get_db)):
-    return db.query(models.CoreValue).all()
+async def get_core_values(request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    not_modified = await not_modified_or_tag(request, response, db, "core_values", CATALOG_CACHE_CONTROL)
+    if not_modified:
+        return not_modified
+    result = await db.execute(select(models.CoreValue))
+    return result.scalars().all()
+
+
+def _praise_query():
+    # Everything PraiseResponse serialises, loaded up front (no lazy loads on an AsyncSession)
+    return select(models.Praise).options(
+        joinedload(models.Praise.giver),
+        joinedload(models.Praise.receiver),
+        joinedload(models.Praise.core_value),
+    )
 
 
 @router.post("/praise", response_model=schemas.PraiseResponse)
-def give_praise(
+async def give_praise(
     praise: schemas.PraiseCreate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(auth.get_current_user_async)
 ):
     if praise.receiver_id == current_user.id:
         raise HTTPException(status_code=400, detail="You cannot praise yourself")
-    receiver = db.query(models.User).filter(models.User.id == praise.receiver_id).first()
+    receiver = await db.get(models.User, praise.receiver_id)
     if not receiver:
         raise HTTPException(status_code=404, detail="Receiver not found")
-    core_value = db.query(models.CoreValue).filter(models.CoreValue.id == praise.core_value_id).first()
+    core_value = await db.get(models.CoreValue, praise.core_value_id)
     if not core_value:
         raise HTTPException(status_code=404, detail="Core value not found")
 
-    points_awarded = 10
-    new_praise = models.Praise(
-        giver_id=current_user.id,
-        receiver_id=praise.receiver_id,
-        message=praise.message,
-        core_value_id=praise.core_value_id,
-        points_awarded=points_awarded
+    return await praise_service.record_praise(db, current_user, receiver, core_value, praise.message)
+
+
+def _encode_cursor(praise):
+    raw = f"{praise.created_at.isoformat()}|{praise.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor):
+    try:
+        created_at, praise_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(praise_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _naive_utc(value):
+    # created_at is stored as naive UTC
+    if value is not None and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class PraiseFilters:
+    """Query-string filters shared by the praise feeds"""
+
+    def __init__(
+        self,
+        giver_id: Optional[int] = None,
+        core_value_id: Optional[int] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        limit: int = Query(20, ge=1, le=100),
+        cursor: Optional[str] = None,
+    ):
+        self.giver_id = giver_id
+        self.core_value_id = core_value_id
+        self.since = _naive_utc(since)
+        self.until = _naive_utc(until)
+        self.limit = limit
+        self.cursor = cursor
+
+
+async def _praise_page(db, filters, receiver_id=None):
+    """One page of praise, newest first, continuing after `filters.cursor` by (created_at, id)"""
+    query = _praise_query()
+    if receiver_id is not None:
+        query = query.where(models.Praise.receiver_id == receiver_id)
+    if filters.giver_id is not None:
+        query = query.where(models.Praise.giver_id == filters.giver_id)
+    if filters.core_value_id is not None:
+        query = query.where(models.Praise.core_value_id == filters.core_value_id)
+    if filters.since is not None:
+        query = query.where(models.Praise.created_at >= filters.since)
+    if filters.until is not None:
+        query = query.where(models.Praise.created_at < filters.until)
+    if filters.cursor:
+        query = query.where(tuple_(models.Praise.created_at, models.Praise.id) < _decode_cursor(filters.cursor))
+
+    # One extra row tells us whether there is a next page
+    result = await db.execute(
+        query.order_by(models.Praise.created_at.desc(), models.Praise.id.desc()).limit(filters.limit + 1)
     )
-    receiver.points_balance += points_awarded
-    current_user.points_balance += 5
-    db.add(new_praise)
-    db.commit()
-    db.refresh(new_praise)
-    return new_praise
+    rows = result.scalars().all()
+    items = rows[:filters.limit]
+    next_cursor = _encode_cursor(items[-1]) if len(rows) > filters.limit else None
+    return {"items": items, "next_cursor": next_cursor}
 
 
-@router.get("/praise", response_model=list[schemas.PraiseResponse])
-def get_all_praise(db: Session = Depends(get_db)):
-    return db.query(models.Praise).order_by(models.Praise.created_at.desc()).all()
+@router.get("/praise", response_model=schemas.PraisePage)
+async def get_all_praise(
+    request: Request,
+    response: Response,
+    receiver_id: Optional[int] = None,
+    filters: PraiseFilters = Depends(),
+    db: AsyncSession = Depends(get_async_db)
+):
+    not_modified = await not_modified_or_tag(request, response, db, "praise", FEED_CACHE_CONTROL)
+    if not_modified:
+        return not_modified
+    return await _praise_page(db, filters, receiver_id=receiver_id)
 
 
-@router.get("/praise/received", response_model=list[schemas.PraiseResponse])
-def get_my_praise(
-    current_user: models.User = Depends(auth.get_current_user),
-    db: Session = Depends(get_db)
+@router.get("/praise/received", response_model=schemas.PraisePage)
+async def get_my_praise(
+    filters: PraiseFilters = Depends(),
+    current_user: models.User = Depends(auth.get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    return db.query(models.Praise).filter(
-        models.Praise.receiver_id == current_user.id
-    ).order_by(models.Praise.created_at.desc()).all()
\ No newline at end of file
+    return await _praise_page(db, filters, receiver_id=current_user.id)
+
+
+@router.get("/praise/stream")
+async def stream_praise(last_event_id: Optional[str] = Header(None)):
+    """Server-Sent Events feed of new praise; reconnecting clients resume from Last-Event-ID"""
+    try:
+        subscriber, replay, reset = praise_broker.subscribe(last_event_id)
+    except TooManySubscribers:
+        raise HTTPException(status_code=503, detail="Too many live connections", headers={"Retry-After": "30"})
+    return StreamingResponse(
+        praise_events(subscriber, replay, reset),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
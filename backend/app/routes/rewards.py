@@ -1,7 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from .. import models, schemas, auth
-from ..database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
+from .. import models, schemas, auth, praise_service
+from ..database import get_db, get_async_db
+from ..http_cache import CATALOG_CACHE_CONTROL, bump_version, not_modified_or_tag
 
 router = APIRouter()
 
@@ -18,46 +21,43 @@ def create_reward(
         point_cost=reward.point_cost
     )
     db.add(new_reward)
+    bump_version(db, "rewards")
     db.commit()
     db.refresh(new_reward)
     return new_reward
 
 
 @router.get("/rewards", response_model=list[schemas.RewardResponse])
-def get_rewards(db: Session = Depends(get_db)):
-    return db.query(models.Reward).filter(models.Reward.is_active == True).all()
+async def get_rewards(request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    not_modified = await not_modified_or_tag(request, response, db, "rewards", CATALOG_CACHE_CONTROL)
+    if not_modified:
+        return not_modified
+    result = await db.execute(select(models.Reward).where(models.Reward.is_active == True))
+    return result.scalars().all()
 
 
 @router.post("/redeem", response_model=schemas.RedemptionResponse)
-def redeem_reward(
+async def redeem_reward(
     redemption: schemas.RedemptionCreate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(auth.get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(auth.get_current_user_async)
 ):
-    reward = db.query(models.Reward).filter(models.Reward.id == redemption.reward_id).first()
+    reward = await db.get(models.Reward, redemption.reward_id)
     if not reward or not reward.is_active:
         raise HTTPException(status_code=404, detail="Reward not found")
-    if current_user.points_balance < reward.point_cost:
+    try:
+        return await praise_service.redeem_reward(db, current_user, reward)
+    except praise_service.NotEnoughPoints:
         raise HTTPException(status_code=400, detail="Not enough points")
 
-    new_redemption = models.Redemption(
-        user_id=current_user.id,
-        reward_id=reward.id,
-        points_spent=reward.point_cost,
-        status="pending"
-    )
-    current_user.points_balance -= reward.point_cost
-    db.add(new_redemption)
-    db.commit()
-    db.refresh(new_redemption)
-    return new_redemption
-
 
 @router.get("/my-redemptions", response_model=list[schemas.RedemptionResponse])
 def get_my_redemptions(
     current_user: models.User = Depends(auth.get_current_user),
     db: Session = Depends(get_db)
 ):
-    return db.query(models.Redemption).filter(
+    return db.query(models.Redemption).options(
+        joinedload(models.Redemption.reward)
+    ).filter(
         models.Redemption.user_id == current_user.id
     ).order_by(models.Redemption.redeemed_at.desc()).all()
\ No newline at end of file
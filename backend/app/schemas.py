@@ -57,6 +57,27 @@ class PraiseResponse(BaseModel):
     
     class Config:
         from_attributes = True
+
+class PraisePage(BaseModel):
+    items: list[PraiseResponse]
+    next_cursor: Optional[str] = None  # pass back as ?cursor= for the next (older) page
+
+# Leaderboard Schemas
+class LeaderboardRow(BaseModel):
+    rank: int
+    user_id: int
+    first_name: str
+    last_name: str
+    praise_count: int
+    points: int
+
+class LeaderboardResponse(BaseModel):
+    period: str
+    period_start: datetime
+    role: str
+    core_value_id: Optional[int] = None
+    entries: list[LeaderboardRow]
+
 # Reward Schemas
 class RewardCreate(BaseModel):
     name: str
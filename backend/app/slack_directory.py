@@ -0,0 +1,112 @@
+import asyncio
+from datetime import datetime
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import or_, select
+from sqlalchemy.dialects.postgresql import insert
+from .alerts import send_alert
+from .database import SessionLocal
+from .http_clients import get_slack_client
+from . import models
+
+
+def _directory_row(member):
+    profile = member.get("profile", {})
+    return {
+        "slack_id": member["id"],
+        "name": member.get("name"),
+        "display_name": profile.get("display_name"),
+        "real_name": member.get("real_name") or profile.get("real_name"),
+        "is_deleted": member.get("deleted", False),
+        "is_bot": member.get("is_bot", False),
+        "updated_at": datetime.utcnow(),
+    }
+
+
+def upsert_slack_members(members, db):
+    """Insert or refresh slack_directory rows for a batch of users.list members"""
+    rows = [_directory_row(m) for m in members if m.get("id")]
+    if not rows:
+        return 0
+    table = models.SlackDirectoryEntry.__table__
+    stmt = insert(table).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.slack_id],
+        set_={
+            col: stmt.excluded[col]
+            for col in ("name", "display_name", "real_name", "is_deleted", "is_bot", "updated_at")
+        },
+    )
+    db.execute(stmt)
+    db.commit()
+    return len(rows)
+
+
+def _upsert_in_new_session(members):
+    db = SessionLocal()
+    try:
+        return upsert_slack_members(members, db)
+    finally:
+        db.close()
+
+
+async def find_user_by_slack_username(username, db):
+    """Resolve a Slack @username to (directory entry, registered User or None) in one query"""
+    username = username.lstrip('@')
+    directory = models.SlackDirectoryEntry
+    result = await db.execute(
+        select(directory, models.User)
+        .outerjoin(models.User, models.User.slack_id == directory.slack_id)
+        .where(
+            or_(directory.name == username, directory.display_name == username),
+            # A name reused after someone left, or shared with a bot, must resolve to the active person
+            directory.is_deleted == False,
+            directory.is_bot == False,
+        )
+        .order_by((directory.name == username).desc())
+        .limit(1)
+    )
+    row = result.first()
+    if not row:
+        return None, None
+    return row[0], row[1]
+
+
+async def sync_slack_directory(client=None):
+    """Page through users.list and upsert every member into slack_directory"""
+    client = client or get_slack_client()
+    cursor = None
+    synced = 0
+    while True:
+        params = {"limit": 200}
+        if cursor:
+            params["cursor"] = cursor
+        response = await client.get("users.list", params=params)
+        data = response.json()
+        if not data.get("ok"):
+            print(f"❌ Failed to sync Slack directory: {data.get('error')}")
+            send_alert("sync_slack_directory", "users.list failed", {"Error": data.get('error'), "Synced so far": synced})
+            return synced
+
+        synced += await run_in_threadpool(_upsert_in_new_session, data.get("members", []))
+        cursor = data.get("response_metadata", {}).get("next_cursor")
+        if not cursor:
+            break
+
+    print(f"✅ Slack directory synced ({synced} members)")
+    return synced
+
+
+async def update_slack_directory_member(member):
+    """Apply a single team_join/user_change profile to slack_directory"""
+    await run_in_threadpool(_upsert_in_new_session, [member])
+
+
+async def run_directory_sync_loop(interval):
+    """Full resync at startup and then every `interval` seconds"""
+    while True:
+        try:
+            await sync_slack_directory()
+        except Exception as e:
+            print(f"❌ Slack directory sync crashed: {type(e).__name__}: {e}")
+            send_alert("run_directory_sync_loop", "Slack directory sync crashed", {"Error": str(e)})
+        await asyncio.sleep(interval)
@@ -1,15 +1,29 @@
 from fastapi import APIRouter, Request, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 import hashlib
 import hmac
 import time
-from .database import get_db
+from functools import partial
+from .database import get_async_db, AsyncSessionLocal
 from . import models
-from .slack_utils import get_user_by_slack_id, get_slack_user_info, send_slack_message, parse_slack_user_id
-from .config import SLACK_SIGNING_SECRET
+from .alerts import send_alert
+from .http_clients import get_slack_client
+from .slack_utils import get_user_by_slack_id, send_slack_message, parse_slack_user_id
+from .slack_directory import find_user_by_slack_username
+from .praise_service import GIVER_POINTS, PRAISE_POINTS, record_praise
+from .config import SLACK_SIGNING_SECRET, SLACK_COMMAND_WORKERS, SLACK_COMMAND_QUEUE_MAXSIZE
+from .workers import WorkerQueue
 
 router = APIRouter()
 
+# /praise acks immediately and finishes here, replying via response_url
+command_queue = WorkerQueue("slack-commands", SLACK_COMMAND_WORKERS, SLACK_COMMAND_QUEUE_MAXSIZE)
+
+# Receipt -> response_url delivery latency for deferred commands
+delayed_response_stats = {"delivered": 0, "failed": 0, "total_ms": 0.0, "max_ms": 0.0, "last_ms": 0.0}
+
 def verify_slack_signature(request_body: bytes, timestamp: str, signature: str):
     """Verify that the request came from Slack"""
     if abs(time.time() - int(timestamp)) > 60 * 5:
@@ -23,35 +37,21 @@ def verify_slack_signature(request_body: bytes, timestamp: str, signature: str):
     ).hexdigest()
     
     return hmac.compare_digest(my_signature, signature)
-@router.post("/slack/praise")
-async def slack_praise_command(request: Request, db: Session = Depends(get_db)):
-    """Handle /praise command from Slack"""
-    from .slack_utils import get_slack_user_by_username
-    
-    # Get raw body for signature verification
-    body = await request.body()
-    
-    # Verify request is from Slack
-    timestamp = request.headers.get("X-Slack-Request-Timestamp")
-    signature = request.headers.get("X-Slack-Signature")
-    
-    if not verify_slack_signature(body, timestamp, signature):
-        raise HTTPException(status_code=401, detail="Invalid signature")
-    
-    # Parse form data
-    form_data = await request.form()
-    slack_user_id = form_data.get("user_id")
-    text = form_data.get("text", "").strip()
-    
+
+async def process_praise_command(slack_user_id, text, db):
+    """Parse /praise text and record the praise.
+
+    Returns (slash command response, receiver DM as (slack_id, text) or None).
+    """
     # Get giver from database
-    giver = get_user_by_slack_id(slack_user_id, db)
+    giver = await get_user_by_slack_id(slack_user_id, db)
     if not giver:
         return {
             "response_type": "ephemeral",
             "text": "❌ You need to link your Slack account first. Please register on the web app and we'll connect your account."
-        }
+        }, None
     
-    available_values = db.query(models.CoreValue).all()
+    available_values = (await db.execute(select(models.CoreValue))).scalars().all()
     values_list = " or ".join([f"`{cv.name}`" for cv in available_values])
     # Parse the command text
     # Expected format: @username "message" #core-value
@@ -61,13 +61,13 @@ async def slack_praise_command(request: Request, db: Session = Depends(get_db)):
         return {
             "response_type": "ephemeral",
             "text": f"❌ Please start with @username\n\nExample: `/praise @User Great job today! #above`\n\nCore values: {values_list}"
-        }
+        }, None
     parts = text.split(None, 1)  # Split on first space
     if len(parts) < 2:
         return {
             "response_type": "ephemeral",
             "text": f"❌ Please include a message\n\nExample: `/praise @julie.tellesc Great job! #above`"
-        }
+        }, None
     
     username = parts[0][1:]  # Remove @
     rest_of_text = parts[1]
@@ -94,84 +94,154 @@ async def slack_praise_command(request: Request, db: Session = Depends(get_db)):
         return {
             "response_type": "ephemeral",
             "text": f"❌ Please include a core value with #\n\nExample: `/praise @julie.tellesc Great job! #above`\n\nCore values: {values_list}"
-        }
+        }, None
     
     if not message or len(message.strip()) < 3:
         return {
             "response_type": "ephemeral",
             "text": "❌ Please include a message about why you're giving praise"
-        }
+        }, None
     
     # Clean up message (remove quotes if present)
     message = message.strip().strip('"').strip("'")
     
-    # Look up Slack user ID by username
-    receiver_slack_id = get_slack_user_by_username(username)
+    # Look up Slack user and registered receiver from the synced directory
+    directory_entry, receiver = await find_user_by_slack_username(username, db)
     
-    if not receiver_slack_id:
+    if not directory_entry:
         return {
             "response_type": "ephemeral",
             "text": f"❌ Could not find Slack user '@{username}'. Make sure the username is correct."
-        }
+        }, None
+    receiver_slack_id = directory_entry.slack_id
     
-    # Get receiver from database
-    receiver = get_user_by_slack_id(receiver_slack_id, db)
     if not receiver:
-        slack_info = get_slack_user_info(receiver_slack_id)
         return {
             "response_type": "ephemeral",
-            "text": f"❌ {slack_info['real_name'] if slack_info else username} hasn't registered yet. They need to sign up on the web app first."
-        }
+            "text": f"❌ {directory_entry.real_name or username} hasn't registered yet. They need to sign up on the web app first."
+        }, None
     
     # Can't praise yourself
     if giver.id == receiver.id:
         return {
             "response_type": "ephemeral",
             "text": "❌ You can't praise yourself!"
-        }
-    
-    # Create praise
-    points_awarded = 10
-    new_praise = models.Praise(
-        giver_id=giver.id,
-        receiver_id=receiver.id,
-        message=message,
-        core_value_id=core_value.id,
-        points_awarded=points_awarded
-    )
+        }, None
     
-    # Update points
-    receiver.points_balance += points_awarded
-    giver.points_balance += 5
+    points_awarded = PRAISE_POINTS
     
-    db.add(new_praise)
-    db.commit()
-    
-    # Send DM to receiver
-    send_slack_message(
+    dm = (
         receiver_slack_id,
         f"🎉 You received praise from {giver.first_name}!\n\n*{core_value.name}*\n\"{message}\"\n\n+{points_awarded} points"
     )
     
-    return {
+    response = {
         "response_type": "in_channel",
-        "text": f"🎉 {giver.first_name} praised {receiver.first_name} for *{core_value.name}*!\n\n\"{message}\"\n\n+{points_awarded} points to {receiver.first_name}, +5 points to {giver.first_name}"
+        "text": f"🎉 {giver.first_name} praised {receiver.first_name} for *{core_value.name}*!\n\n\"{message}\"\n\n+{points_awarded} points to {receiver.first_name}, +{GIVER_POINTS} points to {giver.first_name}"
     }
+    
+    # Create praise and update points - last, so nothing that can fail runs after the commit
+    await record_praise(db, giver, receiver, core_value, message)
+    return response, dm
 
-@router.post("/slack/my-praise")
-async def slack_my_praise_command(request: Request, db: Session = Depends(get_db)):
-    """Handle /my-praise command from Slack"""
+async def send_delayed_response(response_url, payload, received_at):
+    """Deliver a slash command reply through its response_url and record the end-to-end latency"""
+    try:
+        result = await get_slack_client().post(response_url, json=payload)
+        result.raise_for_status()
+    except Exception as e:
+        delayed_response_stats["failed"] += 1
+        print(f"❌ Failed to deliver delayed response: {e}")
+        send_alert("send_delayed_response", "Failed to post to response_url", {"Error": str(e)})
+        return
+
+    elapsed_ms = (time.monotonic() - received_at) * 1000
+    delayed_response_stats["delivered"] += 1
+    delayed_response_stats["total_ms"] += elapsed_ms
+    delayed_response_stats["max_ms"] = max(delayed_response_stats["max_ms"], elapsed_ms)
+    delayed_response_stats["last_ms"] = elapsed_ms
+    print(f"⏱️ Delayed /praise response delivered in {elapsed_ms:.0f}ms")
+
+
+async def complete_praise_command(slack_user_id, text, response_url, received_at):
+    """Background half of /praise: record the praise, DM the receiver, announce via response_url"""
+    response = dm = None
+    try:
+        async with AsyncSessionLocal() as db:
+            response, dm = await process_praise_command(slack_user_id, text, db)
+    except Exception as e:
+        if response is None:
+            print(f"❌ Failed to record praise: {type(e).__name__}: {e}")
+            send_alert("complete_praise_command", "Failed to record praise", {"Slack user": slack_user_id, "Error": str(e)})
+            response, dm = {"response_type": "ephemeral", "text": "❌ Something went wrong recording your praise. Please try again."}, None
+        else:
+            # Only closing the session failed - the praise is committed, so announce it rather than invite a retry
+            print(f"⚠️ Praise recorded but closing the session failed: {type(e).__name__}: {e}")
+
+    await send_delayed_response(response_url, response, received_at)
+
+    # Send DM to receiver
+    if dm:
+        await send_slack_message(*dm)
+
+
+def command_stats():
+    """Command queue metrics plus delayed-response latency"""
+    delivered = delayed_response_stats["delivered"]
+    return {
+        **command_queue.stats(),
+        "delayed_responses": delivered,
+        "delayed_response_failures": delayed_response_stats["failed"],
+        "delayed_response_avg_ms": round(delayed_response_stats["total_ms"] / delivered, 1) if delivered else 0.0,
+        "delayed_response_max_ms": round(delayed_response_stats["max_ms"], 1),
+        "delayed_response_last_ms": round(delayed_response_stats["last_ms"], 1),
+    }
+
+@router.post("/slack/praise")
+async def slack_praise_command(request: Request):
+    """Handle /praise command from Slack"""
+    received_at = time.monotonic()
+
+    # Get raw body for signature verification
     body = await request.body()
+    
+    # Verify request is from Slack
     timestamp = request.headers.get("X-Slack-Request-Timestamp")
     signature = request.headers.get("X-Slack-Signature")
     
     if not verify_slack_signature(body, timestamp, signature):
         raise HTTPException(status_code=401, detail="Invalid signature")
     
+    # Parse form data
     form_data = await request.form()
     slack_user_id = form_data.get("user_id")
+    text = form_data.get("text", "").strip()
+    response_url = form_data.get("response_url")
+    
+    if not text:
+        return {
+            "response_type": "ephemeral",
+            "text": "❌ Please start with @username\n\nExample: `/praise @User Great job today! #above`"
+        }
+    
+    # Ack within Slack's 3s deadline; the rest is delivered through response_url
+    accepted = await command_queue.submit(
+        partial(complete_praise_command, slack_user_id, text, response_url, received_at)
+    )
+    if not accepted:
+        return {
+            "response_type": "ephemeral",
+            "text": "❌ Praise is busy right now - please try again in a moment."
+        }
     
-    user = get_user_by_slack_id(slack_user_id, db)
+    return {
+        "response_type": "ephemeral",
+        "text": "⏳ Working on it..."
+    }
+
+async def recent_praise_response(slack_user_id, db):
+    """Build the /my-praise reply"""
+    user = await get_user_by_slack_id(slack_user_id, db)
     if not user:
         return {
             "response_type": "ephemeral",
@@ -179,9 +249,14 @@ async def slack_my_praise_command(request: Request, db: Session = Depends(get_db
         }
     
     # Get user's praise
-    praise_list = db.query(models.Praise).filter(
-        models.Praise.receiver_id == user.id
-    ).order_by(models.Praise.created_at.desc()).limit(5).all()
+    result = await db.execute(
+        select(models.Praise)
+        .options(joinedload(models.Praise.core_value), joinedload(models.Praise.giver))
+        .where(models.Praise.receiver_id == user.id)
+        .order_by(models.Praise.created_at.desc())
+        .limit(5)
+    )
+    praise_list = result.scalars().all()
     
     if not praise_list:
         return {
@@ -199,8 +274,23 @@ async def slack_my_praise_command(request: Request, db: Session = Depends(get_db
         "text": praise_text
     }
 
+@router.post("/slack/my-praise")
+async def slack_my_praise_command(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """Handle /my-praise command from Slack"""
+    body = await request.body()
+    timestamp = request.headers.get("X-Slack-Request-Timestamp")
+    signature = request.headers.get("X-Slack-Signature")
+    
+    if not verify_slack_signature(body, timestamp, signature):
+        raise HTTPException(status_code=401, detail="Invalid signature")
+    
+    form_data = await request.form()
+    slack_user_id = form_data.get("user_id")
+    
+    return await recent_praise_response(slack_user_id, db)
+
 @router.post("/slack/my-points")
-async def slack_my_points_command(request: Request, db: Session = Depends(get_db)):
+async def slack_my_points_command(request: Request, db: AsyncSession = Depends(get_async_db)):
     """Handle /my-points command from Slack"""
     body = await request.body()
     timestamp = request.headers.get("X-Slack-Request-Timestamp")
@@ -212,7 +302,7 @@ async def slack_my_points_command(request: Request, db: Session = Depends(get_db
     form_data = await request.form()
     slack_user_id = form_data.get("user_id")
     
-    user = get_user_by_slack_id(slack_user_id, db)
+    user = await get_user_by_slack_id(slack_user_id, db)
     if not user:
         return {
             "response_type": "ephemeral",
@@ -1,8 +1,8 @@
+import asyncio
 import re
-import httpx
+import time
 from datetime import datetime, timedelta
 from .config import (
-    SLACK_BOT_TOKEN,
     SLACK_WORKSPACE_DOMAIN,
     CHANNEL_TO_TRELLO_LIST,
     SLACK_TO_TRELLO_MEMBER,
@@ -10,20 +10,26 @@ from .config import (
     L10VA_BOARD_7DAY_LIST,
     L10VA_CHANNEL_ID,
     MEETINGS_CHANNEL_ID_PIN,
-    TRELLO_API_KEY,
-    TRELLO_TOKEN,
+    IMAGE_MAX_BYTES_PER_CARD,
 )
 from .alerts import send_alert
+from .cache import TTLCache
+from .http_clients import get_slack_client, get_trello_client
+from .outbox import enqueue, intent, outbox_executor
 from .slack_helpers import (
     extract_full_message_content,
     get_channel_name,
     get_user_info,
 )
-from .trello_helpers import create_trello_card
+from .slack_metadata import get_channel_route
+from .trello_helpers import CardUploadBudget, attach_image_to_card, trello_card_fields
 
+# Slack user ID -> DM channel ID
+dm_channel_cache = TTLCache("slack-dm-channels", 24 * 3600, 1000)
 
-async def handle_tta_message(event):
-    """Handle TTA message - create Trello card in appropriate board"""
+
+async def _card_intent(event, event_id, handler_name, route_key, card_type):
+    """Shared TTA/announcement path: resolve the list and record a durable card-creation intent"""
     original_text, forwarded_images = await extract_full_message_content(event)
     user_id = event.get("user")
     channel_id = event.get("channel")
@@ -35,72 +41,192 @@ async def handle_tta_message(event):
 
     message_link = f"https://{SLACK_WORKSPACE_DOMAIN}.slack.com/archives/{channel_id}/p{timestamp.replace('.', '')}"
 
-    channel_config = CHANNEL_TO_TRELLO_LIST.get(channel_name, {})
-    trello_list_id = channel_config.get("issues")
+    channel_config = get_channel_route(channel_id) or CHANNEL_TO_TRELLO_LIST.get(channel_name, {})
+    trello_list_id = channel_config.get(route_key)
 
     if not trello_list_id:
-        print(f"⚠️ No Trello board mapped for channel #{channel_name} - skipping")
-        await send_alert("handle_tta_message", "No Trello board mapped for channel", {"Channel": channel_name})
+        label = "Trello board" if route_key == "issues" else "announcement list"
+        print(f"⚠️ No {label} mapped for channel #{channel_name} - skipping")
+        send_alert(handler_name, f"No {label} mapped for channel", {"Channel": channel_name})
         return
 
     files = event.get("files", [])
     direct_images = [f for f in files if f.get("mimetype", "").startswith("image/")]
     all_images = direct_images + forwarded_images
 
-    print(f"📎 Found {len(all_images)} image(s) attached to TTA message")
-
-    await create_trello_card(
-        list_id=trello_list_id,
-        channel_name=channel_name,
-        user_name=user_real_name,
-        message=original_text,
-        slack_link=message_link,
-        images=all_images,
-        card_type="TTA"
-    )
+    print(f"📎 Found {len(all_images)} image(s) attached to {card_type} message")
+
+    card_key = f"{event_id}:card"
+    intents = [intent(
+        card_key,
+        "trello_card",
+        {
+            "list_id": trello_list_id,
+            "channel_name": channel_name,
+            "user_name": user_real_name,
+            "message": original_text,
+            "slack_link": message_link,
+            "card_type": card_type,
+        },
+        alert=(handler_name, "Trello card never created after max retries", {"Channel": channel_name, "Type": card_type}),
+    )]
+
+    # Images upload concurrently, so the per-card byte cap is split between them up front
+    max_bytes = IMAGE_MAX_BYTES_PER_CARD // max(1, len(all_images))
+    for index, image in enumerate(all_images):
+        image_name = image.get("name", "attachment.jpg")
+        intents.append(intent(
+            f"{event_id}:image:{index}",
+            "trello_attachment",
+            {"card_key": card_key, "image": image, "max_bytes": max_bytes},
+            depends_on=[card_key],
+            alert=("attach_image_to_card", "Image never attached after max retries", {"Image": image_name, "Channel": channel_name}),
+        ))
+
+    await enqueue(intents)
+
+
+async def handle_tta_message(event, event_id):
+    """Handle TTA message - create Trello card in appropriate board"""
+    await _card_intent(event, event_id, "handle_tta_message", "issues", "TTA")
 
 
-async def handle_announcement_message(event):
+async def handle_announcement_message(event, event_id):
     """Handle announcement - create Trello card in announcement list"""
-    original_text, forwarded_images = await extract_full_message_content(event)
-    user_id = event.get("user")
-    channel_id = event.get("channel")
-    timestamp = event.get("ts")
+    await _card_intent(event, event_id, "handle_announcement_message", "announcement", "Announcement")
 
-    channel_name = await get_channel_name(channel_id)
-    user_info = await get_user_info(user_id)
-    user_real_name = user_info.get("real_name", "Unknown User")
 
-    message_link = f"https://{SLACK_WORKSPACE_DOMAIN}.slack.com/archives/{channel_id}/p{timestamp.replace('.', '')}"
+async def _timed(step, coro):
+    """Await a handler step and log how long it took"""
+    start = time.perf_counter()
+    try:
+        return await coro
+    finally:
+        print(f"⏱️ {step} took {(time.perf_counter() - start) * 1000:.0f}ms")
 
-    channel_config = CHANNEL_TO_TRELLO_LIST.get(channel_name, {})
-    trello_list_id = channel_config.get("announcement")
 
-    if not trello_list_id:
-        print(f"⚠️ No announcement list mapped for channel #{channel_name} - skipping")
-        await send_alert("handle_announcement_message", "No announcement list mapped for channel", {"Channel": channel_name})
-        return
+async def open_dm_channel(user_id, client=None):
+    """DM channel ID for a user (cached - conversations.open returns the same channel every time)"""
+    client = client or get_slack_client()
+
+    async def load():
+        response = await client.post("conversations.open", json={"users": user_id})
+        return response.json()["channel"]["id"]
+
+    return await dm_channel_cache.get_or_load(user_id, load)
 
-    files = event.get("files", [])
-    direct_images = [f for f in files if f.get("mimetype", "").startswith("image/")]
-    all_images = direct_images + forwarded_images
 
-    print(f"📎 Found {len(all_images)} image(s) attached to announcement")
+# ============== OUTBOX EXECUTORS ==============
+# Each step raises on failure so the outbox retries it; results feed dependent steps
 
-    await create_trello_card(
-        list_id=trello_list_id,
-        channel_name=channel_name,
-        user_name=user_real_name,
-        message=original_text,
-        slack_link=message_link,
-        images=all_images,
-        card_type="Announcement"
+def _ok(data, allowed_errors=()):
+    if not data.get("ok") and data.get("error") not in allowed_errors:
+        raise RuntimeError(data.get("error") or "unknown Slack error")
+    return data
+
+
+def _card_links(card_links, deps, label_format):
+    """Lines for every dependency card that was created (failed cards are left out)"""
+    lines = ""
+    for label, key in card_links:
+        url = (deps.get(key) or {}).get("url")
+        if url:
+            lines += label_format.format(label=label, url=url)
+    return lines
+
+
+@outbox_executor("slack_pin")
+async def pin_message(payload, deps):
+    response = await get_slack_client().post(
+        "pins.add",
+        json={"channel": payload["channel"], "timestamp": payload["timestamp"]}
     )
+    # A redelivered pin is already done
+    _ok(response.json(), allowed_errors=("already_pinned",))
+    print(f"📌 Pinned message in {payload['channel']}")
+    return {"pinned": True}
 
 
-async def handle_task_message(event):
-    """Handle TASK keyword in #l10-va - pins, creates Trello cards on two boards, DMs assignees"""
-    original_text, forwarded_images = await extract_full_message_content(event)
+@outbox_executor("trello_card")
+async def create_card(payload, deps):
+    fields = trello_card_fields(
+        payload["channel_name"], payload["user_name"], payload["message"], payload["slack_link"], payload["card_type"]
+    )
+    response = await get_trello_client().post("cards", json={**fields, "idList": payload["list_id"]})
+    card = response.json()
+    if not card.get("id"):
+        raise RuntimeError(f"Trello card not created: {card}")
+    print(f"✅ Trello {payload['card_type']} card created in #{payload['channel_name']} board: {card.get('url')}")
+    return {"id": card["id"], "url": card.get("url")}
+
+
+@outbox_executor("trello_attachment")
+async def attach_image(payload, deps):
+    card = deps.get(payload["card_key"])
+    if not card:
+        # The card itself failed for good - nothing to attach to
+        return {"attached": False, "bytes": 0}
+
+    if "max_bytes" in payload:
+        allowance = payload["max_bytes"]
+    else:
+        # Rows recorded while a card's images ran one after another carry the cap forward instead
+        used = sum((deps.get(key) or {}).get("bytes", 0) for key in payload.get("previous_keys", []))
+        allowance = max(0, IMAGE_MAX_BYTES_PER_CARD - used)
+    budget = CardUploadBudget(allowance)
+    outcome = await attach_image_to_card(card["id"], payload["image"], budget=budget)
+    if outcome == "not_ready":
+        raise RuntimeError(f"{payload['image'].get('name', 'image')} not ready in Slack yet")
+    return {"attached": outcome == "attached", "bytes": allowance - budget.remaining}
+
+
+@outbox_executor("trello_task_card")
+async def create_task_card(payload, deps):
+    response = await get_trello_client().post("cards", params={**payload["card_fields"], "idList": payload["list_id"]})
+    card = response.json()
+    if not card.get("id"):
+        raise RuntimeError(f"Trello card not created: {card}")
+    print(f"✅ Created card on {payload['board_label']}: {card.get('shortUrl')}")
+    return {"id": card["id"], "url": card.get("shortUrl")}
+
+
+@outbox_executor("slack_task_dm")
+async def dm_assignee(payload, deps):
+    client = get_slack_client()
+    dm_text = payload["dm_text"] + _card_links(payload["card_links"], deps, "*{label}:* {url}\n")
+    dm_channel = await open_dm_channel(payload["user_id"], client)
+    response = await client.post(
+        "chat.postMessage",
+        json={"channel": dm_channel, "text": f"👋 Hey {payload['name']}, you've been assigned a new task!\n\n{dm_text}"}
+    )
+    _ok(response.json())
+    print(f"✅ DM sent to {payload['name']}")
+    return {"sent": True}
+
+
+@outbox_executor("slack_task_reply")
+async def post_task_reply(payload, deps):
+    reply_text = f"✅ Task created and assigned to {payload['assigned_names']}!\n"
+    reply_text += _card_links(payload["card_links"], deps, "📋 *{label}:* {url}\n")
+    response = await get_slack_client().post(
+        "chat.postMessage",
+        json={
+            "channel": payload["channel"],
+            "thread_ts": payload["thread_ts"],
+            "text": reply_text
+        }
+    )
+    _ok(response.json())
+    print(f"✅ Thread reply posted with Trello links")
+    return {"sent": True}
+
+
+async def handle_task_message(event, event_id):
+    """Handle TASK keyword in #l10-va - pins, creates Trello cards on two boards, DMs assignees.
+
+    Every side-effect is written to the outbox keyed by event_id + step, so a restart
+    resumes the remaining steps and a Slack redelivery doesn't repeat finished ones.
+    """
     raw_text = event.get("text", "")
     user_id = event.get("user")
     channel_id = event.get("channel")
@@ -110,29 +236,35 @@ async def handle_task_message(event):
     if channel_id != L10VA_CHANNEL_ID:
         return
 
+    client = get_slack_client()
+
+    # 1. Pin is recorded first so it runs while the rest is resolved
+    await enqueue([intent(
+        f"{event_id}:pin",
+        "slack_pin",
+        {"channel": channel_id, "timestamp": timestamp},
+        alert=("handle_task_message", "Failed to pin message", {"Channel": channel_id, "Posted by": f"<@{user_id}>"}),
+    )])
+
     message_link = f"https://{SLACK_WORKSPACE_DOMAIN}.slack.com/archives/{channel_id}/p{timestamp.replace('.', '')}"
 
     # Extract tagged Slack users from raw text (before mention expansion)
-    mentioned_users = re.findall(r"<@(U[A-Z0-9]+)>", event.get("text", ""))
-    assigned_slack_ids = mentioned_users if mentioned_users else []
+    assigned_slack_ids = re.findall(r"<@(U[A-Z0-9]+)>", raw_text)
     assigned_trello_ids = [
         SLACK_TO_TRELLO_MEMBER[uid]
         for uid in assigned_slack_ids
         if uid in SLACK_TO_TRELLO_MEMBER
     ]
 
-    # Get assigned users' names
-    assigned_names = []
-    for uid in assigned_slack_ids:
-        user_info = await get_user_info(uid)
-        name = user_info.get("real_name", "Unknown")
-        assigned_names.append(name)
-
-    assigned_names_str = ", ".join(assigned_names) if assigned_names else "Unassigned"
-
-    # Get poster's name
-    poster_info = await get_user_info(user_id)
+    # 2. Message text and every name lookup concurrently
+    (original_text, _), poster_info, *assigned_infos = await _timed("text + name lookups", asyncio.gather(
+        extract_full_message_content(event, client),
+        get_user_info(user_id, client),
+        *(get_user_info(uid, client) for uid in assigned_slack_ids),
+    ))
     poster_name = poster_info.get("real_name", "Unknown")
+    assigned_names = [info.get("real_name", "Unknown") for info in assigned_infos]
+    assigned_names_str = ", ".join(assigned_names) if assigned_names else "Unassigned"
 
     due_date = (datetime.utcnow() + timedelta(days=7)).strftime("%Y-%m-%dT12:00:00.000Z")
 
@@ -143,121 +275,68 @@ async def handle_task_message(event):
         f"---\n\n"
         f"{original_text}"
     )
+    card_fields = {
+        "name": raw_text[:80],
+        "desc": card_description,
+        "due": due_date,
+    }
+    if assigned_trello_ids:
+        card_fields["idMembers"] = assigned_trello_ids
+    alert_context = {"Assigned to": assigned_names_str, "Posted by": poster_name}
+
+    # 3. Both boards' cards (run concurrently by the outbox workers)
+    alyanna_key = f"{event_id}:card:alyanna"
+    l10va_key = f"{event_id}:card:l10va"
+    intents = [
+        intent(key, "trello_task_card", {"list_id": list_id, "board_label": label, "card_fields": card_fields},
+               alert=("handle_task_message", f"Failed to create card on {label}", alert_context))
+        for key, list_id, label in (
+            (alyanna_key, ALYANNA_BOARD_7DAY_LIST, "Alyanna's board"),
+            (l10va_key, L10VA_BOARD_7DAY_LIST, "L10-VA board"),
+        )
+    ]
 
-    async with httpx.AsyncClient() as client:
-        # 1. Pin the message
-        try:
-            await client.post(
-                "https://slack.com/api/pins.add",
-                headers={"Authorization": f"Bearer {SLACK_BOT_TOKEN}"},
-                json={"channel": channel_id, "timestamp": timestamp}
-            )
-            print(f"📌 Pinned message in {channel_id}")
-        except Exception as e:
-            print(f"❌ Failed to pin message: {e}")
-            await send_alert("handle_task_message", "Failed to pin message", {"Channel": channel_id, "Posted by": poster_name, "Error": str(e)})
-
-        # 2. Create card on Alyanna's board
-        alyanna_card_url = None
-        try:
-            card_data = {
-                "key": TRELLO_API_KEY,
-                "token": TRELLO_TOKEN,
-                "idList": ALYANNA_BOARD_7DAY_LIST,
-                "name": raw_text[:80],
-                "desc": card_description,
-                "due": due_date,
-            }
-            if assigned_trello_ids:
-                card_data["idMembers"] = assigned_trello_ids
-
-            response = await client.post("https://api.trello.com/1/cards", params=card_data)
-            alyanna_card = response.json()
-            alyanna_card_url = alyanna_card.get("shortUrl")
-            print(f"✅ Created card on Alyanna's board: {alyanna_card_url}")
-        except Exception as e:
-            print(f"❌ Failed to create Alyanna board card: {e}")
-            await send_alert("handle_task_message", "Failed to create card on Alyanna's board", {"Assigned to": assigned_names_str, "Posted by": poster_name, "Error": str(e)})
-
-        # 3. Create card on L10-VA board
-        l10va_card_url = None
-        try:
-            card_data = {
-                "key": TRELLO_API_KEY,
-                "token": TRELLO_TOKEN,
-                "idList": L10VA_BOARD_7DAY_LIST,
-                "name": raw_text[:80],
-                "desc": card_description,
-                "due": due_date,
-            }
-            if assigned_trello_ids:
-                card_data["idMembers"] = assigned_trello_ids
-
-            response = await client.post("https://api.trello.com/1/cards", params=card_data)
-            l10va_card = response.json()
-            l10va_card_url = l10va_card.get("shortUrl")
-            print(f"✅ Created card on L10-VA board: {l10va_card_url}")
-        except Exception as e:
-            print(f"❌ Failed to create L10-VA board card: {e}")
-            await send_alert("handle_task_message", "Failed to create card on L10-VA board", {"Assigned to": assigned_names_str, "Posted by": poster_name, "Error": str(e)})
-
-        # 4. DM all assigned VAs
-        for i, uid in enumerate(assigned_slack_ids):
-            try:
-                name = assigned_names[i] if i < len(assigned_names) else "there"
-                dm_response = await client.post(
-                    "https://slack.com/api/conversations.open",
-                    headers={"Authorization": f"Bearer {SLACK_BOT_TOKEN}"},
-                    json={"users": uid}
-                )
-                dm_channel = dm_response.json()["channel"]["id"]
-
-                dm_text = (
-                    f"👋 Hey {name}, you've been assigned a new task!\n\n"
-                    f"*Task:* {original_text}\n"
-                    f"*Posted by:* {poster_name}\n"
-                    f"*Due:* 7 days from today\n\n"
-                    f"*Slack message:* {message_link}\n"
-                )
-                if alyanna_card_url:
-                    dm_text += f"*Alyanna's board:* {alyanna_card_url}\n"
-                if l10va_card_url:
-                    dm_text += f"*L10-VA board:* {l10va_card_url}\n"
-
-                await client.post(
-                    "https://slack.com/api/chat.postMessage",
-                    headers={"Authorization": f"Bearer {SLACK_BOT_TOKEN}"},
-                    json={"channel": dm_channel, "text": dm_text}
-                )
-                print(f"✅ DM sent to {name}")
-            except Exception as e:
-                print(f"❌ Failed to DM {uid}: {e}")
-                await send_alert("handle_task_message", "Failed to DM assigned VA", {"VA Slack ID": uid, "Posted by": poster_name, "Error": str(e)})
-
-        # 5. Reply in thread with Trello links
-        try:
-            reply_text = f"✅ Task created and assigned to {assigned_names_str}!\n"
-            if alyanna_card_url:
-                reply_text += f"📋 *Alyanna's Board:* {alyanna_card_url}\n"
-            if l10va_card_url:
-                reply_text += f"📋 *L10-VA Board:* {l10va_card_url}\n"
-
-            await client.post(
-                "https://slack.com/api/chat.postMessage",
-                headers={"Authorization": f"Bearer {SLACK_BOT_TOKEN}"},
-                json={
-                    "channel": channel_id,
-                    "thread_ts": timestamp,
-                    "text": reply_text
-                }
-            )
-            print(f"✅ Thread reply posted with Trello links")
-        except Exception as e:
-            print(f"❌ Failed to post thread reply: {e}")
-            await send_alert("handle_task_message", "Failed to post thread reply", {"Channel": channel_id, "Posted by": poster_name, "Error": str(e)})
-
-
-async def handle_meetings_pin(event):
+    # 4. DM every assigned VA once the card links are known
+    dm_text = (
+        f"*Task:* {original_text}\n"
+        f"*Posted by:* {poster_name}\n"
+        f"*Due:* 7 days from today\n\n"
+        f"*Slack message:* {message_link}\n"
+    )
+    dm_keys = []
+    for uid, name in zip(assigned_slack_ids, assigned_names):
+        dm_keys.append(f"{event_id}:dm:{uid}")
+        intents.append(intent(
+            dm_keys[-1],
+            "slack_task_dm",
+            {
+                "user_id": uid,
+                "name": name,
+                "dm_text": dm_text,
+                "card_links": [["Alyanna's board", alyanna_key], ["L10-VA board", l10va_key]],
+            },
+            depends_on=[alyanna_key, l10va_key],
+            alert=("handle_task_message", "Failed to DM assigned VA", {"VA Slack ID": uid, "Posted by": poster_name}),
+        ))
+
+    # 5. Thread reply with Trello links goes last
+    intents.append(intent(
+        f"{event_id}:reply",
+        "slack_task_reply",
+        {
+            "channel": channel_id,
+            "thread_ts": timestamp,
+            "assigned_names": assigned_names_str,
+            "card_links": [["Alyanna's Board", alyanna_key], ["L10-VA Board", l10va_key]],
+        },
+        depends_on=[alyanna_key, l10va_key, *dm_keys],
+        alert=("handle_task_message", "Failed to post thread reply", {"Channel": channel_id, "Posted by": poster_name}),
+    ))
+
+    await enqueue(intents)
+
+
+async def handle_meetings_pin(event, event_id):
     """Auto-pin top-level messages in #meetings (not thread replies)"""
     channel_id = event.get("channel")
     timestamp = event.get("ts")
@@ -270,14 +349,9 @@ async def handle_meetings_pin(event):
     if thread_ts and thread_ts != timestamp:
         return
 
-    async with httpx.AsyncClient() as client:
-        try:
-            await client.post(
-                "https://slack.com/api/pins.add",
-                headers={"Authorization": f"Bearer {SLACK_BOT_TOKEN}"},
-                json={"channel": channel_id, "timestamp": timestamp}
-            )
-            print(f"📌 Auto-pinned message in #meetings")
-        except Exception as e:
-            print(f"❌ Failed to auto-pin in #meetings: {e}")
-            await send_alert("handle_meetings_pin", "Failed to auto-pin message in #meetings", {"Error": str(e)})
\ No newline at end of file
+    await enqueue([intent(
+        f"{event_id}:meetings-pin",
+        "slack_pin",
+        {"channel": channel_id, "timestamp": timestamp},
+        alert=("handle_meetings_pin", "Failed to auto-pin message in #meetings", {}),
+    )])
@@ -1,161 +1,168 @@
+import asyncio
 import re
-import httpx
-from .config import SLACK_BOT_TOKEN
+from .config import SLACK_USER_CACHE_TTL, SLACK_USER_CACHE_MAX_ENTRIES
 from .alerts import send_alert
+from .cache import TTLCache
+from .http_clients import get_slack_client
+from .slack_metadata import channel_names, get_usergroup_handle, usergroup_handles
+
+# users.info profiles, refreshed by user_change events
+user_cache = TTLCache("slack-users", SLACK_USER_CACHE_TTL, SLACK_USER_CACHE_MAX_ENTRIES)
+
+
+# User mentions, usergroup mentions and broadcast keywords, matched in a single pass
+MENTION_PATTERN = re.compile(r'<@(U[A-Z0-9]+)>|<!subteam\^([A-Z0-9]+)>|<!(channel|here|everyone)>')
+
+
+async def _resolve_user_name(user_id, client):
+    try:
+        user_data = await get_user_info(user_id, client)
+        return user_data.get("real_name", user_id) if user_data else None
+    except Exception as e:
+        print(f"❌ Error expanding user mention: {e}")
+        send_alert("expand_slack_mentions", "Failed to expand user mention", {"User ID": user_id, "Error": str(e)})
+        return None
+
+
+async def _resolve_usergroup_handle(group_id, client):
+    try:
+        handle = await get_usergroup_handle(group_id, client)
+        if not handle:
+            print(f"⚠️ Usergroup {group_id} not found in list")
+        return handle
+    except Exception as e:
+        print(f"❌ Error expanding usergroup mentions: {e}")
+        send_alert("expand_slack_mentions", "Exception expanding usergroup mentions", {"Error": str(e)})
+        return None
+
+
+async def expand_slack_mentions_many(texts, client=None):
+    """Expand mentions in several texts, resolving each distinct ID once and concurrently"""
+    client = client or get_slack_client()
+
+    user_ids, group_ids = set(), set()
+    for text in texts:
+        for user_id, group_id, _ in MENTION_PATTERN.findall(text):
+            if user_id:
+                user_ids.add(user_id)
+            elif group_id:
+                group_ids.add(group_id)
+
+    lookups = [(f"<@{uid}>", _resolve_user_name(uid, client), user_cache.get(uid) is not None) for uid in user_ids]
+    lookups += [(f"<!subteam^{gid}>", _resolve_usergroup_handle(gid, client), gid in usergroup_handles) for gid in group_ids]
+
+    # Cached IDs resolve without suspending; only misses pay for gather()'s task per lookup
+    replacements = {"<!channel>": "channel", "<!here>": "here", "<!everyone>": "everyone"}
+    misses = [(token, lookup) for token, lookup, cached in lookups if not cached]
+    for token, lookup, cached in lookups:
+        if cached:
+            replacements[token] = await lookup
+    if misses:
+        for (token, _), value in zip(misses, await asyncio.gather(*(lookup for _, lookup in misses))):
+            replacements[token] = value
+    replacements = {token: value for token, value in replacements.items() if value}
+
+    def substitute(match):
+        return replacements.get(match.group(0), match.group(0))
+
+    return [MENTION_PATTERN.sub(substitute, text) for text in texts]
 
 
 async def expand_slack_mentions(text, client=None):
     """Convert Slack mentions to readable names"""
-    if client is None:
-        client = httpx.AsyncClient()
-        close_client = True
-    else:
-        close_client = False
-
-    user_mentions = re.findall(r'<@(U[A-Z0-9]+)>', text)
-    for user_id in user_mentions:
-        try:
-            response = await client.get(
-                "https://slack.com/api/users.info",
-                headers={"Authorization": f"Bearer {SLACK_BOT_TOKEN}"},
-                params={"user": user_id}
-            )
-            data = response.json()
-            if data.get("ok"):
-                name = data.get("user", {}).get("real_name", user_id)
-                text = text.replace(f"<@{user_id}>", name)
-        except Exception as e:
-            print(f"❌ Error expanding user mention: {e}")
-            await send_alert("expand_slack_mentions", "Failed to expand user mention", {"User ID": user_id, "Error": str(e)})
-
-    group_mentions = re.findall(r'<!subteam\^([A-Z0-9]+)>', text)
-    if group_mentions:
-        try:
-            response = await client.get(
-                "https://slack.com/api/usergroups.list",
-                headers={"Authorization": f"Bearer {SLACK_BOT_TOKEN}"}
-            )
-            data = response.json()
-            if data.get("ok"):
-                usergroups = data.get("usergroups", [])
-                group_lookup = {ug["id"]: ug.get("handle", ug["id"]) for ug in usergroups}
-                for group_id in group_mentions:
-                    if group_id in group_lookup:
-                        handle = group_lookup[group_id]
-                        text = text.replace(f"<!subteam^{group_id}>", handle)
-                        print(f"✅ Replaced usergroup {group_id} with {handle}")
-                    else:
-                        print(f"⚠️ Usergroup {group_id} not found in list")
-            else:
-                print(f"❌ Failed to list usergroups: {data.get('error')}")
-                await send_alert("expand_slack_mentions", "Failed to list usergroups", {"Error": data.get('error')})
-        except Exception as e:
-            print(f"❌ Error expanding usergroup mentions: {e}")
-            await send_alert("expand_slack_mentions", "Exception expanding usergroup mentions", {"Error": str(e)})
+    expanded = await expand_slack_mentions_many([text], client)
+    return expanded[0]
 
-    text = text.replace("<!channel>", "channel")
-    text = text.replace("<!here>", "here")
-    text = text.replace("<!everyone>", "everyone")
 
-    if close_client:
-        await client.aclose()
+def _attachment_fallback_section(attachment):
+    """Forwarded-message section built from the attachment itself (used when the original can't be fetched)"""
+    att_text = attachment.get("text", "") or attachment.get("fallback", "")
+    if not att_text:
+        return None
+    author_name = attachment.get("author_name", "Unknown")
+    return (f"\n\n**Forwarded from {author_name}:**\n", att_text)
 
-    return text
 
-
-async def extract_full_message_content(event):
+async def extract_full_message_content(event, client=None):
     """Extract full message text including forwarded content and images"""
-    original_text = event.get("text", "")
+    client = client or get_slack_client()
     images_to_attach = []
 
-    original_text = await expand_slack_mentions(original_text)
+    # (header, raw text) pairs - mentions across all of them are expanded in one batch below
+    sections = [("", event.get("text", ""))]
 
     attachments = event.get("attachments", [])
 
-    async with httpx.AsyncClient() as client:
-        for attachment in attachments:
-            if attachment.get("is_msg_unfurl") or attachment.get("is_share"):
-                from_channel = attachment.get("channel_id") or attachment.get("from_channel")
-                msg_ts = attachment.get("ts")
-
-                if from_channel and msg_ts:
-                    try:
-                        response = await client.get(
-                            "https://slack.com/api/conversations.history",
-                            headers={"Authorization": f"Bearer {SLACK_BOT_TOKEN}"},
-                            params={
-                                "channel": from_channel,
-                                "latest": msg_ts,
-                                "inclusive": True,
-                                "limit": 1
-                            }
-                        )
-                        data = response.json()
-
-                        if data.get("ok") and data.get("messages"):
-                            shared_msg = data["messages"][0]
-                            shared_text = shared_msg.get("text", "")
-                            shared_text = await expand_slack_mentions(shared_text)
-
-                            author_id = shared_msg.get("user")
-                            if author_id:
-                                user_response = await client.get(
-                                    "https://slack.com/api/users.info",
-                                    headers={"Authorization": f"Bearer {SLACK_BOT_TOKEN}"},
-                                    params={"user": author_id}
-                                )
-                                user_data = user_response.json()
-                                if user_data.get("ok"):
-                                    author_name = user_data.get("user", {}).get("real_name", "Unknown")
-                                    original_text += f"\n\n**Forwarded from {author_name}:**\n{shared_text}"
-                                else:
-                                    original_text += f"\n\n**Forwarded message:**\n{shared_text}"
-                            else:
-                                original_text += f"\n\n**Forwarded message:**\n{shared_text}"
-
-                            shared_files = shared_msg.get("files", [])
-                            for file in shared_files:
-                                if file.get("mimetype", "").startswith("image/"):
-                                    images_to_attach.append({
-                                        "url_private": file.get("url_private"),
-                                        "name": file.get("name", "shared_image.jpg"),
-                                        "mimetype": file.get("mimetype", "image/jpeg")
-                                    })
+    for attachment in attachments:
+        if attachment.get("is_msg_unfurl") or attachment.get("is_share"):
+            from_channel = attachment.get("channel_id") or attachment.get("from_channel")
+            msg_ts = attachment.get("ts")
+
+            if from_channel and msg_ts:
+                try:
+                    response = await client.get(
+                        "conversations.history",
+                        params={
+                            "channel": from_channel,
+                            "latest": msg_ts,
+                            "inclusive": True,
+                            "limit": 1
+                        }
+                    )
+                    data = response.json()
+
+                    if data.get("ok") and data.get("messages"):
+                        shared_msg = data["messages"][0]
+                        shared_text = shared_msg.get("text", "")
+
+                        author_id = shared_msg.get("user")
+                        user_data = await get_user_info(author_id, client) if author_id else {}
+                        if user_data:
+                            author_name = user_data.get("real_name", "Unknown")
+                            sections.append((f"\n\n**Forwarded from {author_name}:**\n", shared_text))
                         else:
+                            sections.append(("\n\n**Forwarded message:**\n", shared_text))
+
+                        shared_files = shared_msg.get("files", [])
+                        for file in shared_files:
+                            if file.get("mimetype", "").startswith("image/"):
+                                images_to_attach.append({
+                                    "url_private": file.get("url_private"),
+                                    "name": file.get("name", "shared_image.jpg"),
+                                    "mimetype": file.get("mimetype", "image/jpeg")
+                                })
+                    else:
                         # Channel fetch failed (e.g. DM) - use attachment text directly
-                         att_text = attachment.get("text", "") or attachment.get("fallback", "")
-                        author_name = attachment.get("author_name", "Unknown")
-                        if att_text:
-                            att_text = await expand_slack_mentions(att_text)
-                            original_text += f"\n\n**Forwarded from {author_name}:**\n{att_text}"
-
-                    except Exception as e:
-                        print(f"⚠️ Failed to fetch shared message: {e}")
-                        await send_alert("extract_full_message_content", "Failed to fetch shared message", {"Channel": from_channel, "Error": str(e)})
-                        att_text = attachment.get("text", "") or attachment.get("fallback", "")
-                        author_name = attachment.get("author_name", "Unknown")
-                        if att_text:
-                            att_text = await expand_slack_mentions(att_text)
-                            original_text += f"\n\n**Forwarded from {author_name}:**\n{att_text}"
-
-                if attachment.get("image_url"):
-                    images_to_attach.append({
-                        "url_private": attachment.get("image_url"),
-                        "name": "forwarded_image.jpg",
-                        "mimetype": "image/jpeg"
-                    })
-
-            elif attachment.get("text"):
-                att_text = attachment.get("text", "")
-                att_text = await expand_slack_mentions(att_text)
-                original_text += f"\n\n{att_text}"
-
-                if attachment.get("image_url"):
-                    images_to_attach.append({
-                        "url_private": attachment.get("image_url"),
-                        "name": "attachment_image.jpg",
-                        "mimetype": "image/jpeg"
-                    })
+                        section = _attachment_fallback_section(attachment)
+                        if section:
+                            sections.append(section)
+
+                except Exception as e:
+                    print(f"⚠️ Failed to fetch shared message: {e}")
+                    send_alert("extract_full_message_content", "Failed to fetch shared message", {"Channel": from_channel, "Error": str(e)})
+                    section = _attachment_fallback_section(attachment)
+                    if section:
+                        sections.append(section)
+
+            if attachment.get("image_url"):
+                images_to_attach.append({
+                    "url_private": attachment.get("image_url"),
+                    "name": "forwarded_image.jpg",
+                    "mimetype": "image/jpeg"
+                })
+
+        elif attachment.get("text"):
+            sections.append(("\n\n", attachment.get("text", "")))
+
+            if attachment.get("image_url"):
+                images_to_attach.append({
+                    "url_private": attachment.get("image_url"),
+                    "name": "attachment_image.jpg",
+                    "mimetype": "image/jpeg"
+                })
+
+    expanded = await expand_slack_mentions_many([text for _, text in sections], client)
+    original_text = "".join(header + text for (header, _), text in zip(sections, expanded))
 
     files = event.get("files", [])
     for file in files:
@@ -168,59 +175,56 @@ async def extract_full_message_content(event):
     return original_text, images_to_attach
 
 
-async def get_channel_name(channel_id):
-    """Get channel name from ID"""
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            "https://slack.com/api/conversations.info",
-            headers={"Authorization": f"Bearer {SLACK_BOT_TOKEN}"},
-            params={"channel": channel_id}
-        )
-        data = response.json()
+async def get_channel_name(channel_id, client=None):
+    """Get channel name from ID (served from the metadata cache when known)"""
+    if channel_id in channel_names:
+        return channel_names[channel_id]
+
+    client = client or get_slack_client()
+    response = await client.get("conversations.info", params={"channel": channel_id})
+    data = response.json()
+
+    if not data.get("ok"):
+        print(f"❌ Failed to get channel info: {data.get('error')} for channel {channel_id}")
+        send_alert("get_channel_name", "Failed to get channel info", {"Channel ID": channel_id, "Error": data.get('error')})
+        return "unknown-channel"
+
+    name = data.get("channel", {}).get("name", "unknown-channel")
+    channel_names[channel_id] = name
+    return name
 
-        if not data.get("ok"):
-            print(f"❌ Failed to get channel info: {data.get('error')} for channel {channel_id}")
-            await send_alert("get_channel_name", "Failed to get channel info", {"Channel ID": channel_id, "Error": data.get('error')})
-            return "unknown-channel"
 
-        return data.get("channel", {}).get("name", "unknown-channel")
+async def get_user_info(user_id, client=None):
+    """Get user details from Slack (cached; concurrent lookups share one request)"""
+    return await user_cache.get_or_load(user_id, lambda: _fetch_user_info(user_id, client))
 
 
-async def get_user_info(user_id):
-    """Get user details from Slack"""
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            "https://slack.com/api/users.info",
-            headers={"Authorization": f"Bearer {SLACK_BOT_TOKEN}"},
-            params={"user": user_id}
-        )
-        data = response.json()
+async def _fetch_user_info(user_id, client=None):
+    client = client or get_slack_client()
+    response = await client.get("users.info", params={"user": user_id})
+    data = response.json()
 
-        if not data.get("ok"):
-            print(f"❌ Failed to get user info: {data.get('error')} for user {user_id}")
-            await send_alert("get_user_info", "Failed to get user info", {"User ID": user_id, "Error": data.get('error')})
-            return {}
+    if not data.get("ok"):
+        print(f"❌ Failed to get user info: {data.get('error')} for user {user_id}")
+        send_alert("get_user_info", "Failed to get user info", {"User ID": user_id, "Error": data.get('error')})
+        return {}
 
-        user_data = data.get("user", {})
-        print(f"✅ Got user info for: {user_data.get('real_name', 'Unknown')}")
-        return user_data
+    user_data = data.get("user", {})
+    print(f"✅ Got user info for: {user_data.get('real_name', 'Unknown')}")
+    return user_data
 
 
-async def post_to_slack(channel_id, text=None, blocks=None):
+async def post_to_slack(channel_id, text=None, blocks=None, client=None):
     """Post message to Slack channel"""
-    async with httpx.AsyncClient() as client:
-        payload = {
-            "channel": channel_id,
-            "unfurl_links": False
-        }
-        if blocks:
-            payload["blocks"] = blocks
-        if text:
-            payload["text"] = text
-
-        response = await client.post(
-            "https://slack.com/api/chat.postMessage",
-            headers={"Authorization": f"Bearer {SLACK_BOT_TOKEN}"},
-            json=payload
-        )
-        return response.json()
\ No newline at end of file
+    client = client or get_slack_client()
+    payload = {
+        "channel": channel_id,
+        "unfurl_links": False
+    }
+    if blocks:
+        payload["blocks"] = blocks
+    if text:
+        payload["text"] = text
+
+    response = await client.post("chat.postMessage", json=payload)
+    return response.json()
\ No newline at end of file
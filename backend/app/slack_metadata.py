@@ -0,0 +1,171 @@
+import asyncio
+import time
+from datetime import datetime
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.dialects.postgresql import insert
+from .config import CHANNEL_TO_TRELLO_LIST, L10VA_CHANNEL_ID
+from .alerts import send_alert
+from .database import SessionLocal
+from .http_clients import get_slack_client
+from . import models
+
+# Usergroup ID -> handle
+usergroup_handles = {}
+# Channel ID -> current channel name
+channel_names = {}
+# Channel ID -> CHANNEL_TO_TRELLO_LIST key. Keyed by ID and persisted in
+# slack_channel_routes, so a channel keeps its Trello routing after being
+# renamed in Slack, across restarts too.
+channel_routes = {L10VA_CHANNEL_ID: "l10-va"}
+
+# Don't re-list usergroups more than once a minute for unknown IDs
+USERGROUP_MISS_REFRESH_INTERVAL = 60
+_last_usergroup_refresh = 0.0
+_usergroup_refresh_lock = asyncio.Lock()
+
+
+async def refresh_usergroups(client=None):
+    """Reload every usergroup handle from usergroups.list"""
+    global _last_usergroup_refresh
+    client = client or get_slack_client()
+    _last_usergroup_refresh = time.monotonic()
+    response = await client.get("usergroups.list")
+    data = response.json()
+    if not data.get("ok"):
+        print(f"❌ Failed to list usergroups: {data.get('error')}")
+        send_alert("refresh_usergroups", "Failed to list usergroups", {"Error": data.get('error')})
+        return
+    usergroup_handles.clear()
+    usergroup_handles.update({ug["id"]: ug.get("handle", ug["id"]) for ug in data.get("usergroups", [])})
+
+
+async def refresh_channels(client=None):
+    """Reload channel names from conversations.list and route any newly mapped channels"""
+    client = client or get_slack_client()
+    cursor = None
+    names = {}
+    while True:
+        params = {"types": "public_channel,private_channel", "exclude_archived": True, "limit": 1000}
+        if cursor:
+            params["cursor"] = cursor
+        response = await client.get("conversations.list", params=params)
+        data = response.json()
+        if not data.get("ok"):
+            print(f"❌ Failed to list channels: {data.get('error')}")
+            send_alert("refresh_channels", "Failed to list channels", {"Error": data.get('error')})
+            return
+        names.update({ch["id"]: ch.get("name", "") for ch in data.get("channels", [])})
+        cursor = data.get("response_metadata", {}).get("next_cursor")
+        if not cursor:
+            break
+
+    channel_names.update(names)
+    await _save_routes(build_channel_routes())
+
+
+def _load_routes():
+    db = SessionLocal()
+    try:
+        return dict(db.query(models.SlackChannelRoute.channel_id, models.SlackChannelRoute.route_name).all())
+    finally:
+        db.close()
+
+
+def _insert_routes(routes):
+    db = SessionLocal()
+    try:
+        table = models.SlackChannelRoute.__table__
+        now = datetime.utcnow()
+        rows = [{"channel_id": cid, "route_name": name, "created_at": now} for cid, name in routes.items()]
+        db.execute(insert(table).values(rows).on_conflict_do_nothing(index_elements=[table.c.channel_id]))
+        db.commit()
+    finally:
+        db.close()
+
+
+async def load_channel_routes():
+    """Reload persisted channel ID bindings (including ones made by other processes)"""
+    channel_routes.update(await run_in_threadpool(_load_routes))
+    channel_routes[L10VA_CHANNEL_ID] = "l10-va"
+
+
+async def _save_routes(routes):
+    if not routes:
+        return
+    try:
+        await run_in_threadpool(_insert_routes, routes)
+    except Exception as e:
+        # Forget the bindings so the next refresh tries again
+        for channel_id in routes:
+            channel_routes.pop(channel_id, None)
+        print(f"❌ Failed to save channel routes: {type(e).__name__}: {e}")
+        send_alert("_save_routes", "Failed to save channel routes", {"Channels": ", ".join(routes.values()), "Error": str(e)})
+        return
+    print(f"🔀 Routed {len(routes)} new channel(s) to Trello: {', '.join(routes.values())}")
+
+
+def build_channel_routes():
+    """Bind newly seen channel IDs to Trello lists by name; IDs that are already routed are never remapped.
+
+    Returns the new bindings so the caller can persist them.
+    """
+    new_routes = {}
+    for channel_id, name in channel_names.items():
+        if channel_id not in channel_routes and name in CHANNEL_TO_TRELLO_LIST:
+            channel_routes[channel_id] = new_routes[channel_id] = name
+    return new_routes
+
+
+def get_channel_route(channel_id):
+    """Trello list config for a channel ID, or None if the channel isn't routed"""
+    route_name = channel_routes.get(channel_id)
+    return CHANNEL_TO_TRELLO_LIST.get(route_name) if route_name else None
+
+
+async def get_usergroup_handle(group_id, client=None):
+    """Handle for a usergroup ID, re-listing usergroups (throttled) on a miss"""
+    handle = usergroup_handles.get(group_id)
+    if handle is None:
+        # Concurrent misses wait for a single re-list instead of each starting one
+        async with _usergroup_refresh_lock:
+            handle = usergroup_handles.get(group_id)
+            if handle is None and time.monotonic() - _last_usergroup_refresh > USERGROUP_MISS_REFRESH_INTERVAL:
+                await refresh_usergroups(client)
+                handle = usergroup_handles.get(group_id)
+    return handle
+
+
+async def apply_metadata_event(event):
+    """Update caches from channel/usergroup change events; returns True if the event was one"""
+    event_type = event.get("type")
+    if event_type in ("channel_rename", "channel_created"):
+        channel = event.get("channel", {})
+        if channel.get("id"):
+            channel_names[channel["id"]] = channel.get("name", "")
+            await _save_routes(build_channel_routes())
+        return True
+    if event_type in ("subteam_created", "subteam_updated"):
+        subteam = event.get("subteam", {})
+        if subteam.get("id"):
+            usergroup_handles[subteam["id"]] = subteam.get("handle", subteam["id"])
+        return True
+    return False
+
+
+async def refresh_slack_metadata():
+    """Refresh usergroups, persisted routes and channels; failures keep the previous snapshot"""
+    # Persisted bindings load before channel names, so renamed channels aren't routed (or missed) by name
+    for refresh in (refresh_usergroups, load_channel_routes, refresh_channels):
+        try:
+            await refresh()
+        except Exception as e:
+            print(f"❌ {refresh.__name__} crashed: {type(e).__name__}: {e}")
+            send_alert("refresh_slack_metadata", f"{refresh.__name__} crashed", {"Error": str(e)})
+    print(f"✅ Slack metadata refreshed ({len(channel_names)} channels, {len(usergroup_handles)} usergroups, {len(channel_routes)} routed)")
+
+
+async def run_metadata_refresh_loop(interval):
+    """Background refresh every `interval` seconds (the startup refresh happens in the lifespan)"""
+    while True:
+        await asyncio.sleep(interval)
+        await refresh_slack_metadata()
@@ -1,11 +1,15 @@
 import asyncio
-import httpx
-from .config import TRELLO_API_KEY, TRELLO_TOKEN, SLACK_BOT_TOKEN
+import uuid
+from .config import IMAGE_TRANSFER_CONCURRENCY, IMAGE_TRANSFER_CHUNK_SIZE, IMAGE_MAX_BYTES_PER_CARD
 from .alerts import send_alert
+from .http_clients import get_slack_client, get_trello_client
 
+# Caps simultaneous Slack -> Trello transfers across all cards
+_transfer_slots = asyncio.Semaphore(IMAGE_TRANSFER_CONCURRENCY)
 
-async def create_trello_card(list_id, channel_name, user_name, message, slack_link, images=None, card_type="TTA"):
-    """Create a Trello card in the specified list"""
+
+def trello_card_fields(channel_name, user_name, message, slack_link, card_type="TTA"):
+    """Name, description and position for a TTA/announcement card"""
     title = message[:50] + "..." if len(message) > 50 else message
 
     description = f"""**Type:** {card_type}
@@ -18,111 +22,139 @@ async def create_trello_card(list_id, channel_name, user_name, message, slack_li
 ---
 [🔗 View original Slack message]({slack_link})"""
 
-    result = {}
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.post(
-                "https://api.trello.com/1/cards",
-                params={"key": TRELLO_API_KEY, "token": TRELLO_TOKEN},
-                json={
-                    "idList": list_id,
-                    "name": title,
-                    "desc": description,
-                    "pos": "top"
-                }
-            )
-            result = response.json()
-
-            if not result.get("id"):
-                print(f"❌ Failed to create Trello card: {result}")
-                await send_alert("create_trello_card", "Failed to create Trello card", {"Channel": channel_name, "Type": card_type, "Error": str(result)})
-                return result
-
-            card_id = result.get("id")
-            card_url = result.get("url", "")
-            print(f"✅ Trello {card_type} card created in #{channel_name} board: {card_url}")
-
-            if images:
-                for image in images:
-                    await attach_image_to_card(client, card_id, image)
-
-        except Exception as e:
-            print(f"❌ Exception creating Trello card: {e}")
-            await send_alert("create_trello_card", "Exception creating Trello card", {"Channel": channel_name, "Type": card_type, "Error": str(e)})
-
-    return result
-
-
-async def attach_image_to_card(client, card_id, image):
-    """Download image from Slack and upload to Trello card"""
+    return {"name": title, "desc": description, "pos": "top"}
+
+
+class CardUploadBudget:
+    """Byte allowance for one upload - its share of the per-card cap"""
+
+    def __init__(self, max_bytes):
+        self.remaining = max_bytes
+
+    def reserve(self, size):
+        """Claim `size` bytes; returns False (claiming nothing) if that would exceed the cap"""
+        if size > self.remaining:
+            return False
+        self.remaining -= size
+        return True
+
+
+class AttachmentTooLarge(Exception):
+    pass
+
+
+async def _multipart_body(boundary, head, source, budget, metered):
+    """Multipart body that forwards the Slack download chunk by chunk"""
+    yield head
+    async for chunk in source.aiter_bytes(IMAGE_TRANSFER_CHUNK_SIZE):
+        # Sizes already reserved up front (Content-Length known) aren't counted twice
+        if metered and not budget.reserve(len(chunk)):
+            raise AttachmentTooLarge("per-card image byte cap reached mid-transfer")
+        yield chunk
+    yield f"\r\n--{boundary}--\r\n".encode()
+
+
+async def _stream_upload(trello_client, card_id, image_name, mimetype, image_response, budget):
+    """Pipe an open Slack download straight into a Trello attachment upload"""
+    boundary = uuid.uuid4().hex
+    safe_name = image_name.replace('"', "'")
+    head = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="file"; filename="{safe_name}"\r\n'
+        f"Content-Type: {mimetype}\r\n\r\n"
+    ).encode()
+    tail_length = len(f"\r\n--{boundary}--\r\n")
+
+    headers = {"Content-Type": f"multipart/form-data; boundary={boundary}"}
+    content_length = image_response.headers.get("content-length")
+    # Only advertise a length when the bytes we forward are exactly the bytes on the wire
+    exact_length = content_length and not image_response.headers.get("content-encoding")
+    if exact_length:
+        if not budget.reserve(int(content_length)):
+            raise AttachmentTooLarge(f"{content_length} bytes exceeds the remaining per-card cap")
+        headers["Content-Length"] = str(len(head) + int(content_length) + tail_length)
+
+    return await trello_client.post(
+        f"cards/{card_id}/attachments",
+        content=_multipart_body(boundary, head, image_response, budget, metered=not exact_length),
+        headers=headers,
+        timeout=30.0
+    )
+
+
+async def is_slack_file_ready(file_id, client=None):
+    """Check files.info; returns the file object once Slack has finished processing it, else None"""
+    client = client or get_slack_client()
+    response = await client.get("files.info", params={"file": file_id})
+    data = response.json()
+    if not data.get("ok"):
+        print(f"⏳ files.info not available yet for {file_id}: {data.get('error')}")
+        return None
+    file = data.get("file", {})
+    if file.get("file_access") == "check_file_info" or not file.get("url_private") or not file.get("size"):
+        return None
+    return file
+
+
+async def attach_image_to_card(card_id, image, slack_client=None, trello_client=None, budget=None):
+    """Stream an image from Slack into a Trello card attachment.
+
+    Makes a single attempt and returns "attached", "not_ready" (retry later) or "failed"
+    (permanent: over the byte cap, no URL, or rejected by Trello). Network errors, 429s and
+    5xx responses raise so the caller's retry handles them.
+    """
+    slack_client = slack_client or get_slack_client()
+    trello_client = trello_client or get_trello_client()
+    budget = budget or CardUploadBudget(IMAGE_MAX_BYTES_PER_CARD)
     image_url = image.get("url_private")
     image_name = image.get("name", "attachment.jpg")
     mimetype = image.get("mimetype", "image/jpeg")
 
+    if image_name.upper().endswith('.HEIC'):
+        print(f"🔄 HEIC format detected, renaming to JPG")
+        image_name = image_name.rsplit('.', 1)[0] + '.jpg'
+        mimetype = 'image/jpeg'
+
+    # Slack-hosted files: ask files.info rather than guessing from the download
+    if image.get("id"):
+        file = await is_slack_file_ready(image["id"], slack_client)
+        if not file:
+            return "not_ready"
+        image_url = file.get("url_private")
+
     if not image_url:
         print(f"⚠️ No URL found for image {image_name}")
-        return
+        return "failed"
 
     try:
-        max_retries = 5
-        retry_delay = 2
-        image_data = None
-
-        for attempt in range(max_retries):
-            print(f"⬇️ Attempting to download {image_name} (attempt {attempt + 1}/{max_retries})...")
-
-            image_response = await client.get(
-                image_url,
-                headers={"Authorization": f"Bearer {SLACK_BOT_TOKEN}"},
-                follow_redirects=True,
-                timeout=30.0
-            )
-
-            content_type = image_response.headers.get("content-type", "")
-            content_length = len(image_response.content)
-
-            print(f"📥 Status: {image_response.status_code} | Content-Type: {content_type} | Size: {content_length} bytes")
-
-            if (
-                image_response.status_code == 200
-                and content_length > 1000
-                and "image" in content_type
-            ):
-                image_data = image_response.content
-                print(f"✅ Successfully downloaded {image_name} ({content_length} bytes)")
-                break
-            else:
-                if attempt < max_retries - 1:
-                    print(f"⏳ Image not ready yet, waiting {retry_delay} seconds before retry...")
-                    await asyncio.sleep(retry_delay)
-                else:
-                    print(f"❌ Image never became available after {max_retries} attempts")
-                    await send_alert("attach_image_to_card", "Image never became available after max retries", {"Image": image_name, "Card ID": card_id})
-                    return
-
-        if not image_data:
-            return
-
-        if image_name.upper().endswith('.HEIC'):
-            print(f"🔄 HEIC format detected, renaming to JPG")
-            image_name = image_name.rsplit('.', 1)[0] + '.jpg'
-            mimetype = 'image/jpeg'
-
-        print(f"⬆️ Uploading {image_name} to Trello card...")
-        upload_response = await client.post(
-            f"https://api.trello.com/1/cards/{card_id}/attachments",
-            params={"key": TRELLO_API_KEY, "token": TRELLO_TOKEN},
-            files={"file": (image_name, image_data, mimetype)},
-            timeout=30.0
-        )
-
-        upload_result = upload_response.json()
-        if upload_result.get("id"):
-            print(f"✅ Image attached to Trello card: {image_name}")
-        else:
-            print(f"❌ Failed to attach image: {upload_result}")
-            await send_alert("attach_image_to_card", "Failed to attach image to Trello card", {"Image": image_name, "Card ID": card_id, "Error": str(upload_result)})
-
-    except Exception as e:
-        print(f"❌ Error attaching image: {type(e).__name__}: {e}")
-        await send_alert("attach_image_to_card", "Exception attaching image", {"Image": image_name, "Card ID": card_id, "Error": str(e)})
\ No newline at end of file
+        async with _transfer_slots:
+            async with slack_client.stream("GET", image_url, follow_redirects=True, timeout=30.0) as image_response:
+                content_type = image_response.headers.get("content-type", "")
+                content_length = image_response.headers.get("content-length") or "unknown"
+
+                print(f"📥 Status: {image_response.status_code} | Content-Type: {content_type} | Size: {content_length} bytes")
+
+                if image_response.status_code != 200 or "image" not in content_type:
+                    return "not_ready"
+
+                print(f"⬆️ Streaming {image_name} to Trello card...")
+                upload_response = await _stream_upload(trello_client, card_id, image_name, mimetype, image_response, budget)
+    except AttachmentTooLarge as e:
+        print(f"⚠️ Skipping {image_name}: {e}")
+        send_alert("attach_image_to_card", "Image skipped - card attachment size cap reached", {"Image": image_name, "Card ID": card_id, "Error": str(e)})
+        return "failed"
+
+    status = upload_response.status_code
+    # A streamed upload can't be replayed on 429, so it comes back here like a 5xx
+    if status == 429 or status >= 500:
+        raise RuntimeError(f"Trello attachment upload returned {status}")
+    if status >= 400:
+        print(f"❌ Trello rejected {image_name}: {status} {upload_response.text}")
+        send_alert("attach_image_to_card", "Trello rejected image attachment", {"Image": image_name, "Card ID": card_id, "Error": f"{status} {upload_response.text}"})
+        return "failed"
+
+    upload_result = upload_response.json()
+    if not upload_result.get("id"):
+        raise RuntimeError(f"Trello attachment upload returned no id: {upload_result}")
+    print(f"✅ Image attached to Trello card: {image_name}")
+    return "attached"
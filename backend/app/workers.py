@@ -0,0 +1,109 @@
+import asyncio
+import time
+
+
+class WorkerQueue:
+    """Bounded asyncio queue drained by a fixed pool of worker tasks"""
+
+    def __init__(self, name, workers, maxsize):
+        self.name = name
+        self.worker_count = workers
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.workers = []
+        self.in_flight = set()
+        self.closing = False
+
+        # Metrics
+        self.enqueued = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.active = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def start(self):
+        """Spawn the worker tasks (call from inside the running event loop)"""
+        self.closing = False
+        for i in range(self.worker_count):
+            self.workers.append(asyncio.create_task(self._worker(i)))
+        print(f"🧵 [{self.name}] started {self.worker_count} worker(s)")
+
+    async def stop(self, timeout):
+        """Stop accepting jobs, wait up to `timeout` seconds for the queue to drain, then cancel workers"""
+        self.closing = True
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout)
+            print(f"✅ [{self.name}] drained cleanly")
+        except asyncio.TimeoutError:
+            print(f"⚠️ [{self.name}] drain timed out with {self.queue.qsize()} queued / {self.active} running job(s)")
+
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+
+    def is_in_flight(self, key):
+        """True while a job submitted with `key` is queued or running"""
+        return key in self.in_flight
+
+    async def submit(self, job, key=None, timeout=0):
+        """Queue a zero-argument coroutine function; returns False if the queue stays full"""
+        if self.closing:
+            self.rejected += 1
+            return False
+
+        item = (key, job, time.monotonic())
+        # Mark the key before the put: a worker can take the item and finish it before put() returns
+        added = key is not None and key not in self.in_flight
+        if added:
+            self.in_flight.add(key)
+        try:
+            if timeout:
+                await asyncio.wait_for(self.queue.put(item), timeout)
+            else:
+                self.queue.put_nowait(item)
+        except (asyncio.QueueFull, asyncio.TimeoutError):
+            if added:
+                self.in_flight.discard(key)
+            self.rejected += 1
+            print(f"⚠️ [{self.name}] queue full ({self.queue.qsize()}) - rejecting job {key}")
+            return False
+
+        self.enqueued += 1
+        return True
+
+    async def _worker(self, index):
+        while True:
+            key, job, enqueued_at = await self.queue.get()
+            wait = time.monotonic() - enqueued_at
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            self.active += 1
+            try:
+                await job()
+                self.completed += 1
+            except Exception as e:
+                self.failed += 1
+                print(f"❌ [{self.name}] worker {index} job {key} failed: {type(e).__name__}: {e}")
+            finally:
+                self.active -= 1
+                if key is not None:
+                    self.in_flight.discard(key)
+                self.queue.task_done()
+
+    def stats(self):
+        """Snapshot of queue depth, throughput and wait-time metrics"""
+        started = self.completed + self.failed + self.active
+        return {
+            "depth": self.queue.qsize(),
+            "maxsize": self.queue.maxsize,
+            "workers": self.worker_count,
+            "active": self.active,
+            "enqueued": self.enqueued,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "avg_wait_ms": round(self.total_wait / started * 1000, 1) if started else 0.0,
+            "max_wait_ms": round(self.max_wait * 1000, 1),
+        }
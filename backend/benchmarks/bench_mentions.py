@@ -0,0 +1,126 @@
+"""Mention expansion micro-benchmark: per-section sequential lookups vs one concurrent batch.
+
+Run from backend/:  python -m benchmarks.bench_mentions [--latency-ms 40] [--iterations 2000]
+
+Slack is replaced by an in-process fake whose users.info calls sleep for
+--latency-ms, so the cold numbers measure round trips and the warm numbers
+measure the regex rewrite alone.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import re
+import time
+
+from app.slack_helpers import expand_slack_mentions, expand_slack_mentions_many, get_user_info, user_cache
+from app.slack_metadata import get_usergroup_handle, usergroup_handles
+
+USERS = [f"U{n:08d}" for n in range(8)]
+GROUPS = ["S00000001", "S00000002"]
+
+SECTIONS = [
+    f"Hey <@{USERS[0]}> <@{USERS[1]}> can you check this? cc <!subteam^{GROUPS[0]}> <!here>",
+    f"Forwarded: <@{USERS[2]}> asked <@{USERS[3]}> and <@{USERS[0]}> about the schedule <!channel>",
+    f"<@{USERS[4]}> <@{USERS[5]}> <@{USERS[6]}> <@{USERS[7]}> please review, <!subteam^{GROUPS[1]}>",
+]
+
+
+class _Response:
+    def __init__(self, data):
+        self._data = data
+
+    def json(self):
+        return self._data
+
+
+class FakeSlackClient:
+    """Answers users.info after `latency` seconds and counts the calls"""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.calls = 0
+
+    async def get(self, method, params=None):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        user_id = params["user"]
+        return _Response({"ok": True, "user": {"id": user_id, "real_name": f"Person {user_id[-2:]}"}})
+
+
+async def legacy_expand(text, client):
+    """The pre-batch algorithm: one awaited lookup and one str.replace per mention"""
+    for user_id in re.findall(r'<@(U[A-Z0-9]+)>', text):
+        user_data = await get_user_info(user_id, client)
+        if user_data:
+            text = text.replace(f"<@{user_id}>", user_data.get("real_name", user_id))
+    for group_id in re.findall(r'<!subteam\^([A-Z0-9]+)>', text):
+        handle = await get_usergroup_handle(group_id, client)
+        if handle:
+            text = text.replace(f"<!subteam^{group_id}>", handle)
+    text = text.replace("<!channel>", "channel")
+    text = text.replace("<!here>", "here")
+    text = text.replace("<!everyone>", "everyone")
+    return text
+
+
+async def legacy_sections(client):
+    return [await legacy_expand(text, client) for text in SECTIONS]
+
+
+async def batch_sections(client):
+    return await expand_slack_mentions_many(SECTIONS, client)
+
+
+async def cold(run, latency):
+    user_cache.entries.clear()
+    client = FakeSlackClient(latency)
+    start = time.perf_counter()
+    result = await run(client)
+    return (time.perf_counter() - start) * 1000, client.calls, result
+
+
+async def warm(run, iterations):
+    client = FakeSlackClient(0)
+    await run(client)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await run(client)
+    return (time.perf_counter() - start) / iterations * 1_000_000
+
+
+async def single_text(iterations):
+    client = FakeSlackClient(0)
+    text = SECTIONS[0]
+    await expand_slack_mentions(text, client)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await expand_slack_mentions(text, client)
+    return (time.perf_counter() - start) / iterations * 1_000_000
+
+
+async def main(latency_ms, iterations):
+    usergroup_handles.update({GROUPS[0]: "front-desk", GROUPS[1]: "managers"})
+    # Keep the "Got user info" prints out of the timings
+    with contextlib.redirect_stdout(io.StringIO()):
+        legacy_ms, legacy_calls, legacy_out = await cold(legacy_sections, latency_ms / 1000)
+        batch_ms, batch_calls, batch_out = await cold(batch_sections, latency_ms / 1000)
+        legacy_us = await warm(legacy_sections, iterations)
+        batch_us = await warm(batch_sections, iterations)
+        single_us = await single_text(iterations)
+    assert legacy_out == batch_out, "batch expansion must produce the same text as the legacy path"
+
+    print(f"{len(SECTIONS)} sections, {len(USERS)} distinct users, {len(GROUPS)} usergroups, users.info latency {latency_ms}ms")
+    print(f"cold cache  legacy: {legacy_ms:8.1f} ms  ({legacy_calls} users.info calls)")
+    print(f"cold cache  batch:  {batch_ms:8.1f} ms  ({batch_calls} users.info calls)")
+    print(f"warm cache  legacy: {legacy_us:8.1f} us per message")
+    print(f"warm cache  batch:  {batch_us:8.1f} us per message")
+    print(f"warm cache  expand_slack_mentions (1 section): {single_us:.1f} us")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency-ms", type=float, default=40)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(main(args.latency_ms, args.iterations))
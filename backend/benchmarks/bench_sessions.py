@@ -0,0 +1,147 @@
+"""Sync vs async session benchmark: the /praise feed query at equal concurrency.
+
+Run from backend/ against a scratch database (it creates tables and seeds praise if needed):
+
+    BENCH_DATABASE_URL=postgresql://... python -m benchmarks.bench_sessions [--concurrency 10 50 100]
+
+The sync side runs each request in a thread pool of `concurrency` workers, like
+FastAPI's threadpool for `def` routes; the async side runs `concurrency`
+coroutines on one event loop. Both engines use the DB_POOL_* settings.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app import models
+from app.database import build_async_engine, build_engine
+from app.routes.praise import _praise_query
+
+PAGE_SIZE = 20
+
+
+def seed(engine, praise_count):
+    """Create the tables and top the praise table up to `praise_count` rows"""
+    models.Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        existing = conn.execute(select(func.count()).select_from(models.Praise)).scalar()
+        if existing >= praise_count:
+            return existing
+        user_ids = conn.execute(select(models.User.id)).scalars().all()
+        if len(user_ids) < 2:
+            conn.execute(insert(models.User), [
+                {"email": f"bench-{n}@example.com", "hashed_password": "x", "first_name": "Bench", "last_name": str(n), "points_balance": 0}
+                for n in range(20)
+            ])
+            user_ids = conn.execute(select(models.User.id)).scalars().all()
+        core_value_ids = conn.execute(select(models.CoreValue.id)).scalars().all()
+        if not core_value_ids:
+            conn.execute(insert(models.CoreValue), [{"name": f"Value {n}", "description": ""} for n in range(3)])
+            core_value_ids = conn.execute(select(models.CoreValue.id)).scalars().all()
+        now = datetime.utcnow()
+        conn.execute(insert(models.Praise), [
+            {
+                "giver_id": user_ids[n % len(user_ids)],
+                "receiver_id": user_ids[(n + 1) % len(user_ids)],
+                "core_value_id": core_value_ids[n % len(core_value_ids)],
+                "message": f"Benchmark praise {n}",
+                "points_awarded": 10,
+                "created_at": now - timedelta(minutes=n),
+            }
+            for n in range(existing, praise_count)
+        ])
+    return praise_count
+
+
+def _feed_statement():
+    return _praise_query().order_by(models.Praise.created_at.desc(), models.Praise.id.desc()).limit(PAGE_SIZE + 1)
+
+
+def _summary(latencies, elapsed):
+    latencies = sorted(latencies)
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50": statistics.median(latencies) * 1000,
+        "p95": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+
+def run_sync(engine, concurrency, requests):
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def one_request():
+        start = time.perf_counter()
+        db = SessionLocal()
+        try:
+            db.execute(_feed_statement()).scalars().all()
+        finally:
+            db.close()
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(lambda _: one_request(), range(concurrency)))  # warm the pool
+        start = time.perf_counter()
+        latencies = list(pool.map(lambda _: one_request(), range(requests)))
+        return _summary(latencies, time.perf_counter() - start)
+
+
+async def run_async(engine, concurrency, requests):
+    AsyncSessionLocal = async_sessionmaker(engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+    latencies = []
+
+    async def one_request():
+        start = time.perf_counter()
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(_feed_statement())
+            result.scalars().all()
+        return time.perf_counter() - start
+
+    async def worker(remaining):
+        for _ in remaining:
+            latencies.append(await one_request())
+
+    try:
+        await asyncio.gather(*(one_request() for _ in range(concurrency)))  # warm the pool
+        remaining = iter(range(requests))
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(remaining) for _ in range(concurrency)))
+        return _summary(latencies, time.perf_counter() - start)
+    finally:
+        # asyncpg connections belong to this run's event loop
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", default=os.environ.get("BENCH_DATABASE_URL"))
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 50, 100])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--praise", type=int, default=5000)
+    args = parser.parse_args()
+    if not args.database_url:
+        parser.error("set BENCH_DATABASE_URL or pass --database-url (a scratch database - it gets seeded)")
+
+    engine = build_engine(args.database_url)
+    rows = seed(engine, args.praise)
+    async_engine = build_async_engine(args.database_url)
+    pool_capacity = engine.pool.size() + engine.pool._max_overflow
+    print(f"{rows} praise rows, page size {PAGE_SIZE}, {args.requests} requests per run, pool capacity {pool_capacity} per engine")
+    print(f"{'concurrency':>11}  {'mode':5}  {'req/s':>8}  {'p50 ms':>7}  {'p95 ms':>7}")
+    for concurrency in args.concurrency:
+        for mode, stats in (
+            ("sync", run_sync(engine, concurrency, args.requests)),
+            ("async", asyncio.run(run_async(async_engine, concurrency, args.requests))),
+        ):
+            print(f"{concurrency:>11}  {mode:5}  {stats['rps']:8.0f}  {stats['p50']:7.1f}  {stats['p95']:7.1f}")
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import time
+from logging.config import fileConfig
+from alembic import context
+from sqlalchemy import text
+from app.database import engine
+from app import models
+
+config = context.config
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name)
+
+target_metadata = models.Base.metadata
+
+# Several app processes may boot at once; only one runs the migrations
+MIGRATION_LOCK_ID = 728311
+MIGRATION_LOCK_POLL_SECONDS = 1.0
+
+
+def run_migrations_offline():
+    context.configure(
+        url=engine.url.render_as_string(hide_password=False),
+        target_metadata=target_metadata,
+        literal_binds=True,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def _acquire_migration_lock(connection):
+    """Take the session-level migration lock without holding a snapshot while we wait.
+
+    A blocking pg_advisory_lock keeps its statement's snapshot open, and the holder's
+    CREATE INDEX CONCURRENTLY waits for every older snapshot - the two would deadlock.
+    """
+    while True:
+        acquired = connection.execute(text("SELECT pg_try_advisory_lock(:id)"), {"id": MIGRATION_LOCK_ID}).scalar()
+        connection.commit()
+        if acquired:
+            return
+        print("⏳ Another process is running migrations - waiting")
+        time.sleep(MIGRATION_LOCK_POLL_SECONDS)
+
+
+def run_migrations_online():
+    with engine.connect() as connection:
+        _acquire_migration_lock(connection)
+        try:
+            context.configure(connection=connection, target_metadata=target_metadata)
+            with context.begin_transaction():
+                context.run_migrations()
+        finally:
+            connection.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": MIGRATION_LOCK_ID})
+            connection.commit()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,46 @@
+"""Hot-path indexes for the praise feeds, redemptions and active rewards
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+
+Tables already exist (create_all); this adds the indexes create_all can't
+retrofit onto an existing deployment. Built CONCURRENTLY so a live table
+isn't locked, and IF NOT EXISTS because a fresh database gets them from
+the models via create_all.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_praise_created_at_id", "praise", [sa.text("created_at DESC"), sa.text("id DESC")], None),
+    ("ix_praise_receiver_id_created_at", "praise", ["receiver_id", sa.text("created_at DESC")], None),
+    ("ix_praise_giver_id_created_at", "praise", ["giver_id", sa.text("created_at DESC")], None),
+    ("ix_redemptions_user_id_redeemed_at", "redemptions", ["user_id", sa.text("redeemed_at DESC")], None),
+    ("ix_redemptions_redeemed_at", "redemptions", [sa.text("redeemed_at DESC")], None),
+    ("ix_rewards_active", "rewards", ["id"], sa.text("is_active = true")),
+]
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                postgresql_where=where,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,71 @@
+"""Opening-balance adjustments for the points ledger
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+
+Balances accrued before the ledger existed have no entries behind them.
+One "adjustment" entry per user makes the ledger sum equal points_balance,
+so reconciliation starts from zero drift. Computed against whatever the
+ledger already holds, so entries written by processes that started
+before this migration ran are accounted for.
+
+Tables are spelled out as they were at this revision rather than taken
+from app.models, so later model changes don't change what this does.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+OPENING_BALANCE_NOTE = "Opening balance (pre-ledger history)"
+
+
+def upgrade():
+    # Normally already created by create_all at startup
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS points_ledger (
+            id SERIAL NOT NULL,
+            user_id INTEGER NOT NULL,
+            entry_type VARCHAR NOT NULL,
+            amount INTEGER NOT NULL,
+            praise_id INTEGER,
+            redemption_id INTEGER,
+            note TEXT,
+            created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            PRIMARY KEY (id),
+            FOREIGN KEY (user_id) REFERENCES users (id),
+            FOREIGN KEY (praise_id) REFERENCES praise (id),
+            FOREIGN KEY (redemption_id) REFERENCES redemptions (id)
+        )
+    """)
+    op.execute("CREATE INDEX IF NOT EXISTS ix_points_ledger_id ON points_ledger (id)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_points_ledger_user_id_created_at ON points_ledger (user_id, created_at)")
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS points_snapshots (
+            user_id INTEGER NOT NULL,
+            as_of TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            balance INTEGER NOT NULL,
+            PRIMARY KEY (user_id, as_of),
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    """)
+    op.execute(sa.text("""
+        INSERT INTO points_ledger (user_id, entry_type, amount, note, created_at)
+        SELECT u.id, 'adjustment', u.points_balance - COALESCE(SUM(l.amount), 0), :note,
+               (now() AT TIME ZONE 'utc')
+        FROM users u
+        LEFT JOIN points_ledger l ON l.user_id = u.id
+        GROUP BY u.id, u.points_balance
+        HAVING u.points_balance - COALESCE(SUM(l.amount), 0) <> 0
+    """).bindparams(note=OPENING_BALANCE_NOTE))
+
+
+def downgrade():
+    op.execute(
+        sa.text("DELETE FROM points_ledger WHERE entry_type = 'adjustment' AND note = :note")
+        .bindparams(note=OPENING_BALANCE_NOTE)
+    )
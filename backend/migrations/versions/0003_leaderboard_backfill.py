@@ -0,0 +1,68 @@
+"""Backfill the leaderboard aggregates from existing praise
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+
+New praise updates the leaderboard rows in its own transaction; this
+fills them in for the history that predates the table.
+
+The table, the aggregation SQL and the giver bonus are copied here as
+they were at this revision, so editing app.leaderboard or the points
+constants later doesn't rewrite what this migration did.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+# praise_service.GIVER_POINTS at this revision
+GIVER_POINTS = 5
+
+BACKFILL_SQL = sa.text("""
+    INSERT INTO leaderboard (period, period_start, role, core_value_id, user_id, praise_count, points)
+    SELECT b.period, b.period_start, r.role, cv.core_value_id, r.user_id, COUNT(*), SUM(r.points)
+    FROM praise p
+    CROSS JOIN LATERAL (VALUES
+        ('week', date_trunc('week', p.created_at)),
+        ('month', date_trunc('month', p.created_at)),
+        ('all', TIMESTAMP '1970-01-01')
+    ) AS b(period, period_start)
+    CROSS JOIN LATERAL (VALUES
+        ('receiver', p.receiver_id, p.points_awarded),
+        ('giver', p.giver_id, :giver_points)
+    ) AS r(role, user_id, points)
+    CROSS JOIN LATERAL (VALUES (0), (p.core_value_id)) AS cv(core_value_id)
+    GROUP BY b.period, b.period_start, r.role, cv.core_value_id, r.user_id
+""")
+
+
+def upgrade():
+    # Normally already created by create_all at startup
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS leaderboard (
+            period VARCHAR NOT NULL,
+            period_start TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            role VARCHAR NOT NULL,
+            core_value_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            praise_count INTEGER NOT NULL,
+            points INTEGER NOT NULL,
+            PRIMARY KEY (period, period_start, role, core_value_id, user_id),
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+    """)
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_leaderboard_board_rank "
+        "ON leaderboard (period, period_start, role, core_value_id, praise_count DESC, points DESC, user_id)"
+    )
+    op.execute("LOCK TABLE leaderboard IN EXCLUSIVE MODE")
+    op.execute("DELETE FROM leaderboard")
+    op.execute(BACKFILL_SQL.bindparams(giver_points=GIVER_POINTS))
+
+
+def downgrade():
+    op.execute("DELETE FROM leaderboard")
@@ -0,0 +1,97 @@
+"""Split images out of unfinished Trello card outbox rows
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+
+Card rows used to carry an "images" list that the card step attached
+itself. Images are now separate trello_attachment steps that depend on
+the card, and the card step ignores "images". This gives every pending
+or processing card row those steps, then drops the list from its
+payload. Cards that already finished were handled under the old shape.
+
+The outbox table and the step payload are spelled out as they were at
+this revision rather than taken from app.models / app.slack_handlers.
+"""
+import os
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import insert
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+# Read the way app.config reads it
+IMAGE_MAX_BYTES_PER_CARD = int(os.getenv("IMAGE_MAX_BYTES_PER_CARD", str(50 * 1024 * 1024)))
+
+outbox = sa.table(
+    "outbox",
+    sa.column("id", sa.Integer),
+    sa.column("idempotency_key", sa.String),
+    sa.column("kind", sa.String),
+    sa.column("payload", sa.JSON),
+    sa.column("depends_on", sa.JSON),
+    sa.column("status", sa.String),
+    sa.column("attempts", sa.Integer),
+    sa.column("available_at", sa.DateTime),
+    sa.column("created_at", sa.DateTime),
+    sa.column("updated_at", sa.DateTime),
+)
+
+
+def _image_steps(card_key, payload, now):
+    event_id = card_key[: -len(":card")]
+    images = payload["images"]
+    max_bytes = IMAGE_MAX_BYTES_PER_CARD // len(images)
+    return [
+        {
+            "idempotency_key": f"{event_id}:image:{index}",
+            "kind": "trello_attachment",
+            "payload": {
+                "card_key": card_key,
+                "image": image,
+                "max_bytes": max_bytes,
+                "_alert": [
+                    "attach_image_to_card",
+                    "Image never attached after max retries",
+                    {"Image": image.get("name", "attachment.jpg"), "Channel": payload.get("channel_name")},
+                ],
+            },
+            "depends_on": [card_key],
+            "status": "pending",
+            "attempts": 0,
+            "available_at": now,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for index, image in enumerate(images)
+    ]
+
+
+def upgrade():
+    conn = op.get_bind()
+    rows = conn.execute(
+        sa.select(outbox.c.id, outbox.c.idempotency_key, outbox.c.payload)
+        .where(outbox.c.kind == "trello_card", outbox.c.status.in_(("pending", "processing")))
+        .with_for_update()
+    ).all()
+
+    now = datetime.utcnow()
+    for row_id, card_key, payload in rows:
+        if "images" not in payload:
+            continue
+        if payload["images"] and card_key.endswith(":card"):
+            conn.execute(
+                insert(outbox)
+                .values(_image_steps(card_key, payload, now))
+                .on_conflict_do_nothing(index_elements=["idempotency_key"])
+            )
+        card_payload = {key: value for key, value in payload.items() if key != "images"}
+        conn.execute(outbox.update().where(outbox.c.id == row_id).values(payload=card_payload, updated_at=now))
+
+
+def downgrade():
+    pass
@@ -0,0 +1,43 @@
+"""Extend ix_leaderboard_board_rank with the tie-break columns
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+
+top_entries orders by praise_count DESC, points DESC, user_id. The index
+stopped at praise_count, so ties needed a sort on top of the index scan.
+Databases that got the short index from 0003 or create_all before this
+revision are rebuilt here; the rest already have the full one.
+
+Built CONCURRENTLY under a temporary name and swapped in, so board reads
+keep an index the whole time and praise inserts aren't blocked.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+COLUMNS = "period, period_start, role, core_value_id, praise_count DESC, points DESC, user_id"
+
+
+def upgrade():
+    indexdef = op.get_bind().execute(
+        sa.text("SELECT indexdef FROM pg_indexes WHERE indexname = 'ix_leaderboard_board_rank'")
+    ).scalar()
+    if indexdef and "user_id" in indexdef:
+        return
+
+    with op.get_context().autocommit_block():
+        # Left behind (possibly invalid) if an earlier run was interrupted
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_leaderboard_board_rank_full")
+        op.execute(f"CREATE INDEX CONCURRENTLY ix_leaderboard_board_rank_full ON leaderboard ({COLUMNS})")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_leaderboard_board_rank")
+        op.execute("ALTER INDEX ix_leaderboard_board_rank_full RENAME TO ix_leaderboard_board_rank")
+
+
+def downgrade():
+    # The short index only made reads slower; nothing to restore
+    pass
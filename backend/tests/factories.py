@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta
+from sqlalchemy import insert, select
+from app import models
+
+
+def add_users(db, count, points_balance=0, prefix="user"):
+    """Users with an opening-balance ledger entry, so the ledger and points_balance agree"""
+    users = [
+        models.User(
+            email=f"{prefix}{n}@example.com",
+            hashed_password="x",
+            first_name="User",
+            last_name=str(n),
+            points_balance=points_balance,
+        )
+        for n in range(count)
+    ]
+    db.add_all(users)
+    db.flush()
+    if points_balance:
+        db.add_all(
+            models.PointsLedgerEntry(user_id=user.id, entry_type="adjustment", amount=points_balance, note="opening balance")
+            for user in users
+        )
+    db.commit()
+    return users
+
+
+def add_core_values(db, count):
+    core_values = [models.CoreValue(name=f"Value {n}", description="") for n in range(count)]
+    db.add_all(core_values)
+    db.commit()
+    return core_values
+
+
+def add_rewards(db, count, point_cost=30, active_every=1):
+    """`count` rewards, every `active_every`-th one active"""
+    db.execute(insert(models.Reward), [
+        {"name": f"Reward {n}", "description": "", "point_cost": point_cost, "is_active": n % active_every == 0}
+        for n in range(count)
+    ])
+    db.commit()
+    return db.execute(select(models.Reward).order_by(models.Reward.id)).scalars().all()
+
+
+def add_praise(db, count, user_ids, core_value_ids, receiver_ids=None):
+    """`count` praise rows, a minute apart, spread over every giver/receiver/core value"""
+    receiver_ids = receiver_ids or user_ids
+    now = datetime.utcnow()
+    db.execute(insert(models.Praise), [
+        {
+            "giver_id": user_ids[n % len(user_ids)],
+            "receiver_id": receiver_ids[(n + 1) % len(receiver_ids)],
+            "core_value_id": core_value_ids[n % len(core_value_ids)],
+            "message": f"Praise {n}",
+            "points_awarded": 10,
+            "created_at": now - timedelta(minutes=n),
+        }
+        for n in range(count)
+    ])
+    db.commit()
+
+
+def add_redemptions(db, count, user_ids, reward_ids):
+    now = datetime.utcnow()
+    db.execute(insert(models.Redemption), [
+        {
+            "user_id": user_ids[n % len(user_ids)],
+            "reward_id": reward_ids[n % len(reward_ids)],
+            "points_spent": 30,
+            "status": "pending",
+            "redeemed_at": now - timedelta(minutes=n),
+        }
+        for n in range(count)
+    ])
+    db.commit()
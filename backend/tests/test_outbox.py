@@ -0,0 +1,54 @@
+"""Outbox claiming: dependency ordering, missing dependencies, and the per-kind queue metrics."""
+from datetime import datetime, timedelta
+from app import models
+from app.outbox import _claim_batch, add_intents, claim_waits, intent, outbox_metrics
+
+
+def _status(db, key):
+    db.expire_all()
+    return db.query(models.OutboxMessage.status).filter(models.OutboxMessage.idempotency_key == key).scalar()
+
+
+def test_step_waits_for_pending_dependency(db):
+    add_intents([intent("e1:card", "trello_card", {}), intent("e1:image:0", "trello_attachment", {}, depends_on=["e1:card"])], db)
+
+    claimed = _claim_batch(10)
+
+    assert [job["key"] for job in claimed] == ["e1:card"]
+    assert _status(db, "e1:image:0") == "pending"
+
+
+def test_step_runs_with_results_of_done_dependencies(db):
+    add_intents([intent("e1:card", "trello_card", {}), intent("e1:image:0", "trello_attachment", {}, depends_on=["e1:card"])], db)
+    db.query(models.OutboxMessage).filter(models.OutboxMessage.idempotency_key == "e1:card").update(
+        {"status": "done", "result": {"id": "card-1"}}
+    )
+    db.commit()
+
+    claimed = _claim_batch(10)
+
+    assert [(job["key"], job["deps"]) for job in claimed] == [("e1:image:0", {"e1:card": {"id": "card-1"}})]
+
+
+def test_missing_dependency_counts_as_failed(db):
+    # e.g. the card row finished and was purged before this step was claimed
+    add_intents([intent("e1:image:0", "trello_attachment", {}, depends_on=["e1:card"])], db)
+
+    claimed = _claim_batch(10)
+
+    assert [(job["key"], job["deps"], job["attempts"]) for job in claimed] == [("e1:image:0", {}, 1)]
+    assert _status(db, "e1:image:0") == "processing"
+
+
+def test_metrics_report_queue_depth_and_claim_wait_per_kind(db):
+    add_intents([intent(f"e{n}:image:0", "trello_attachment", {}) for n in range(3)], db)
+    db.query(models.OutboxMessage).update({"created_at": datetime.utcnow() - timedelta(seconds=30)})
+    db.commit()
+    claim_waits.clear()
+
+    _claim_batch(2)
+    queue = outbox_metrics()["queues"]["trello_attachment"]
+
+    assert (queue["pending"], queue["processing"], queue["claims"]) == (1, 2, 2)
+    assert queue["oldest_pending_seconds"] >= 30
+    assert 30 <= queue["avg_claim_wait_seconds"] <= queue["max_claim_wait_seconds"] < 60
@@ -0,0 +1,97 @@
+"""Concurrent praise and redemptions against Postgres: no lost updates, no overspending.
+
+Every operation runs in its own AsyncSession (its own connection), all at once
+on one event loop, so the row locks taken by the atomic UPDATEs are really contended.
+"""
+import asyncio
+import random
+from collections import Counter
+from sqlalchemy import func, select
+from app import models
+from app.database import AsyncSessionLocal
+from app.points_ledger import find_drift
+from app.praise_service import GIVER_POINTS, PRAISE_POINTS, NotEnoughPoints, record_praise, redeem_reward
+from .factories import add_core_values, add_rewards, add_users
+
+
+async def _praise(giver_id, receiver_id, core_value_id):
+    async with AsyncSessionLocal() as db:
+        giver = await db.get(models.User, giver_id)
+        receiver = await db.get(models.User, receiver_id)
+        core_value = await db.get(models.CoreValue, core_value_id)
+        await record_praise(db, giver, receiver, core_value, "Thanks!")
+
+
+async def _redeem(user_id, reward_id):
+    """Balance after a successful redemption, or None if it was refused"""
+    async with AsyncSessionLocal() as db:
+        user = await db.get(models.User, user_id)
+        reward = await db.get(models.Reward, reward_id)
+        try:
+            await redeem_reward(db, user, reward)
+        except NotEnoughPoints:
+            return None
+        return user.points_balance
+
+
+def _balances(db):
+    db.expire_all()
+    return dict(db.execute(select(models.User.id, models.User.points_balance)).all())
+
+
+def test_concurrent_redemptions_never_overspend(db, run):
+    [user] = add_users(db, 1, points_balance=100)
+    [reward] = add_rewards(db, 1, point_cost=30)
+
+    async def redeem_all():
+        return await asyncio.gather(*(_redeem(user.id, reward.id) for _ in range(40)))
+
+    results = run(redeem_all())
+    accepted = [balance for balance in results if balance is not None]
+
+    assert len(accepted) == 3
+    assert sorted(accepted) == [10, 40, 70]
+    assert _balances(db)[user.id] == 10
+    assert db.query(models.Redemption).count() == 3
+    assert find_drift(db) == []
+
+
+def test_concurrent_praise_and_redemptions_keep_exact_balances(db, run):
+    users = add_users(db, 6, points_balance=40)
+    [core_value] = add_core_values(db, 1)
+    [reward] = add_rewards(db, 1, point_cost=30)
+    user_ids = [u.id for u in users]
+
+    rng = random.Random(7)
+    praise_ops = [tuple(rng.sample(user_ids, 2)) for _ in range(150)]
+    redeem_ops = [rng.choice(user_ids) for _ in range(150)]
+
+    async def run_everything():
+        operations = [_praise(giver, receiver, core_value.id) for giver, receiver in praise_ops]
+        operations += [_redeem(user_id, reward.id) for user_id in redeem_ops]
+        rng.shuffle(operations)
+        return await asyncio.gather(*operations)
+
+    results = run(run_everything())
+    accepted = [balance for balance in results if balance is not None]
+
+    # Every balance observed right after a redemption, and every final balance, is non-negative
+    assert all(balance >= 0 for balance in accepted)
+    balances = _balances(db)
+    assert all(balance >= 0 for balance in balances.values())
+
+    redeemed = Counter(user_id for user_id, in db.query(models.Redemption.user_id))
+    assert sum(redeemed.values()) == len(accepted)
+    received = Counter(receiver for _, receiver in praise_ops)
+    given = Counter(giver for giver, _ in praise_ops)
+    for user_id in user_ids:
+        expected = (
+            40
+            + PRAISE_POINTS * received[user_id]
+            + GIVER_POINTS * given[user_id]
+            - reward.point_cost * redeemed[user_id]
+        )
+        assert balances[user_id] == expected, f"user {user_id}: {balances[user_id]} != {expected}"
+
+    assert db.query(func.count(models.Praise.id)).scalar() == len(praise_ops)
+    assert find_drift(db) == []
@@ -0,0 +1,58 @@
+"""Resume rules for /praise/stream: replay only when continuity from Last-Event-ID is provable."""
+import asyncio
+from app.praise_stream import PraiseBroker, praise_events
+
+
+def _stream(broker, last_event_id=None):
+    """Everything the stream would send to a client reconnecting with `last_event_id`"""
+    subscriber, replay, reset = broker.subscribe(last_event_id)
+
+    async def collect():
+        broker.close()
+        return [chunk async for chunk in praise_events(subscriber, replay, reset)]
+
+    return "".join(asyncio.run(collect()))
+
+
+def _broker(published=0, buffer_size=3):
+    broker = PraiseBroker(buffer_size, max_subscribers=10, queue_size=10)
+    for n in range(1, published + 1):
+        broker.publish(f'{{"n": {n}}}')
+    return broker
+
+
+def test_new_client_gets_a_resume_point_before_any_praise():
+    broker = _broker()
+    assert _stream(broker).endswith(f"id: {broker.epoch}-0\n\n")
+
+
+def test_resume_replays_everything_after_last_event_id():
+    broker = _broker(published=5)
+    body = _stream(broker, f"{broker.epoch}-3")
+    assert "event: reset" not in body
+    assert f"id: {broker.epoch}-4\n" in body and f"id: {broker.epoch}-5\n" in body
+    assert f"id: {broker.epoch}-3\n" not in body
+
+
+def test_up_to_date_client_gets_nothing_to_replay():
+    broker = _broker(published=5)
+    body = _stream(broker, f"{broker.epoch}-5")
+    assert "event: reset" not in body and "event: praise" not in body
+
+
+def test_reset_when_events_were_evicted():
+    broker = _broker(published=5)  # buffer holds 3..5
+    assert "event: reset" in _stream(broker, f"{broker.epoch}-1")
+    assert "event: reset" not in _stream(broker, f"{broker.epoch}-2")
+
+
+def test_reset_after_restart_even_with_an_empty_buffer():
+    before = _broker(published=5)
+    after = _broker()
+    assert "event: reset" in _stream(after, f"{before.epoch}-5")
+
+
+def test_reset_for_unknown_or_future_ids():
+    broker = _broker(published=5)
+    for last_event_id in (f"{broker.epoch}-9", "17", "garbage"):
+        assert "event: reset" in _stream(broker, last_event_id), last_event_id
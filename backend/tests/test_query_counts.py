@@ -0,0 +1,63 @@
+"""List endpoints must issue a fixed number of SQL statements however many rows they return.
+
+Each endpoint is called on a small data set and again after adding more users,
+rewards, praise and redemptions; an N+1 query (a lazy load per row) makes the
+second count larger. Counts come from start_query_count via X-DB-Queries.
+"""
+import pytest
+from app.leaderboard import rebuild_leaderboard
+from app.praise_service import GIVER_POINTS
+from .conftest import api_client, auth_headers
+from .factories import add_core_values, add_praise, add_redemptions, add_rewards, add_users
+
+# Statements per request, auth lookup and conditional-GET version read included
+LIST_ENDPOINTS = {
+    "/praise": 2,
+    "/praise/received": 2,
+    "/praise?limit=100": 2,
+    "/core-values": 2,
+    "/rewards": 2,
+    "/leaderboard?period=all": 1,
+    "/leaderboard?period=all&role=giver": 1,
+    "/my-redemptions": 2,
+    "/admin/redemptions": 2,
+    "/admin/users": 2,
+}
+
+
+def _seed(db, users, distinct, rows):
+    """`distinct` rewards/core values and `rows` praise and redemptions, half of them the current user's"""
+    core_values = add_core_values(db, distinct)
+    rewards = add_rewards(db, distinct)
+    user_ids, core_value_ids, reward_ids = [u.id for u in users], [cv.id for cv in core_values], [r.id for r in rewards]
+    add_praise(db, rows, user_ids, core_value_ids)
+    add_praise(db, rows, user_ids, core_value_ids, receiver_ids=[users[0].id])
+    add_redemptions(db, rows, user_ids, reward_ids)
+    add_redemptions(db, rows, [users[0].id], reward_ids)
+    rebuild_leaderboard(db, GIVER_POINTS)
+
+
+def _count(run, path, headers):
+    async def request():
+        async with api_client() as client:
+            return await client.get(path, headers=headers)
+    response = run(request())
+    assert response.status_code == 200, response.text
+    return int(response.headers["X-DB-Queries"])
+
+
+@pytest.mark.parametrize("path", LIST_ENDPOINTS)
+def test_list_endpoint_query_count_does_not_grow_with_rows(db, run, path):
+    users = add_users(db, 3)
+    headers = auth_headers(users[0])
+    _seed(db, users, distinct=2, rows=2)
+    small = _count(run, path, headers)
+
+    # Many more distinct related rows: each one would be its own lazy load under N+1
+    users += add_users(db, 30, prefix="more")
+    _seed(db, users, distinct=20, rows=60)
+    large = _count(run, path, headers)
+
+    assert small <= LIST_ENDPOINTS[path], f"{path} issued {small} statements"
+    assert large == small, f"{path} went from {small} to {large} statements with more rows (N+1)"
+
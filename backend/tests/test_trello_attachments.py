@@ -0,0 +1,49 @@
+"""attach_image_to_card: transient upload failures raise for the outbox to retry, permanent ones return."""
+import asyncio
+import httpx
+import pytest
+from app.trello_helpers import CardUploadBudget, attach_image_to_card
+
+IMAGE = {"name": "photo.png", "mimetype": "image/png", "url_private": "https://files.slack.com/photo.png"}
+
+
+def _attach(trello_response, image=IMAGE, budget=None):
+    def slack(request):
+        return httpx.Response(200, headers={"content-type": "image/png", "content-length": "4"}, content=b"\x89PNG")
+
+    def trello(request):
+        request.read()
+        return trello_response
+
+    async def attach():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(slack)) as slack_client, \
+                httpx.AsyncClient(transport=httpx.MockTransport(trello), base_url="https://api.trello.com/1/") as trello_client:
+            return await attach_image_to_card("card-1", image, slack_client, trello_client, budget)
+
+    return asyncio.run(attach())
+
+
+def test_uploaded_attachment_is_attached():
+    assert _attach(httpx.Response(200, json={"id": "att-1"})) == "attached"
+
+
+@pytest.mark.parametrize("response", [
+    httpx.Response(503, text="unavailable"),
+    httpx.Response(429, text="rate limited"),
+    httpx.Response(200, json={"message": "no id"}),
+])
+def test_transient_upload_failures_raise(response):
+    with pytest.raises(RuntimeError):
+        _attach(response)
+
+
+def test_rejected_upload_is_permanent():
+    assert _attach(httpx.Response(400, text="invalid file")) == "failed"
+
+
+def test_over_the_byte_cap_is_permanent():
+    assert _attach(httpx.Response(200, json={"id": "att-1"}), budget=CardUploadBudget(3)) == "failed"
+
+
+def test_missing_url_is_permanent():
+    assert _attach(httpx.Response(200, json={"id": "att-1"}), image={"name": "photo.png"}) == "failed"
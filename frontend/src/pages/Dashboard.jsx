@@ -1,17 +1,19 @@
 import { useState, useEffect } from 'react';
 import { apiService } from '../services/api';
 
+const RECENT_LIMIT = 20;
+
 function Dashboard() {
   const [praise, setPraise] = useState([]);
   const [currentIndex, setCurrentIndex] = useState(0);
   const [loading, setLoading] = useState(true);
 
-  // Fetch all praise on component mount
+  // Fetch the most recent praise on mount, then follow the live stream
   useEffect(() => {
     const fetchPraise = async () => {
       try {
-        const response = await apiService.getAllPraise();
-        setPraise(response.data);
+        const response = await apiService.getAllPraise({ limit: RECENT_LIMIT });
+        setPraise(response.data.items);
       } catch (error) {
         console.error('Error fetching praise:', error);
       } finally {
@@ -20,6 +22,18 @@ function Dashboard() {
     };
 
     fetchPraise();
+
+    const stream = apiService.openPraiseStream();
+    stream.addEventListener('praise', (event) => {
+      const newPraise = JSON.parse(event.data);
+      setPraise((prev) => [newPraise, ...prev.filter((p) => p.id !== newPraise.id)].slice(0, RECENT_LIMIT));
+      // Show the new praise right away
+      setCurrentIndex(0);
+    });
+    // The server no longer has everything we missed while disconnected
+    stream.addEventListener('reset', fetchPraise);
+
+    return () => stream.close();
   }, []);
 
   // Auto-rotate through praise every 4 seconds
@@ -4,7 +4,9 @@ import { apiService } from '../services/api';
 function MyProfile() {
   const [user, setUser] = useState(null);
   const [myPraise, setMyPraise] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
     const fetchData = async () => {
@@ -15,7 +17,8 @@ function MyProfile() {
         ]);
 
         setUser(userResponse.data);
-        setMyPraise(praiseResponse.data);
+        setMyPraise(praiseResponse.data.items);
+        setNextCursor(praiseResponse.data.next_cursor);
       } catch (error) {
         console.error('Error fetching profile:', error);
       } finally {
@@ -26,6 +29,19 @@ function MyProfile() {
     fetchData();
   }, []);
 
+  const loadMore = async () => {
+    setLoadingMore(true);
+    try {
+      const response = await apiService.getMyPraise({ cursor: nextCursor });
+      setMyPraise((prev) => [...prev, ...response.data.items]);
+      setNextCursor(response.data.next_cursor);
+    } catch (error) {
+      console.error('Error fetching more praise:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   if (loading) {
     return (
       <div style={styles.container}>
@@ -53,7 +69,9 @@ function MyProfile() {
       </div>
 
       <div style={styles.section}>
-        <h2 style={styles.sectionTitle}>Praise I've Received ({myPraise.length})</h2>
+        <h2 style={styles.sectionTitle}>
+          Praise I've Received ({myPraise.length}{nextCursor ? '+' : ''})
+        </h2>
         
         {myPraise.length === 0 ? (
           <p style={styles.emptyMessage}>No praise yet. Keep up the great work!</p>
@@ -76,6 +94,11 @@ function MyProfile() {
                 </div>
               </div>
             ))}
+            {nextCursor && (
+              <button style={styles.loadMore} onClick={loadMore} disabled={loadingMore}>
+                {loadingMore ? 'Loading...' : 'Load more'}
+              </button>
+            )}
           </div>
         )}
       </div>
@@ -168,6 +191,15 @@ const styles = {
   },
   from: {},
   date: {},
+  loadMore: {
+    alignSelf: 'center',
+    padding: '10px 24px',
+    backgroundColor: '#007bff',
+    color: 'white',
+    border: 'none',
+    borderRadius: '4px',
+    cursor: 'pointer',
+  },
 };
 
 export default MyProfile;
\ No newline at end of file
@@ -51,12 +51,18 @@ export const apiService = {
     return api.post('/praise', praiseData);
   },
 
-  getAllPraise() {
-    return api.get('/praise');
+  // Paginated: returns { items, next_cursor }; pass next_cursor back as params.cursor
+  getAllPraise(params = {}) {
+    return api.get('/praise', { params });
   },
 
-  getMyPraise() {
-    return api.get('/praise/received');
+  getMyPraise(params = {}) {
+    return api.get('/praise/received', { params });
+  },
+
+  // Live feed of new praise (Server-Sent Events; the browser reconnects and resumes on its own)
+  openPraiseStream() {
+    return new EventSource(`${API_URL}/praise/stream`);
   },
 
   // Rewards